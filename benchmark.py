@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+NAME: Primary Key Finder - Benchmark
+
+Generates synthetic tables of different shapes, writes them as CSV (and
+xlsx when openpyxl is installed) and times the phases of a scan
+separately: loading, encoding and the combination search. The results
+are saved as JSON and can be compared with the results of an earlier
+run, so a performance regression shows up in numbers.
+"""
+
+import sys
+import os
+import json
+import time
+import platform
+import tempfile
+import numpy as np
+import pandas as pd
+
+import primarykey
+
+USAGESTRING = "benchmark [--scale <f>] [--repeat <n>] [--formats csv,xlsx] [--xlsb <file.xlsb>] [--output <file.json>] [--compare <old.json>] [--threshold <percent>]"
+
+# Workload shapes: rows, random columns (cardinality of each), planted composite
+# keys (cardinalities of their columns), near-keys (cardinalities, share of duplicates)
+WORKLOADS = {
+    "narrow": {"rows": 100000, "columns": [10, 50, 200, 1000, 5000], "keys": [[400, 250]], "nearkeys": [([500, 200], 0.001)], "maxcolumns": 3},
+    "wide": {"rows": 20000, "columns": [2, 3, 5, 8, 12, 20, 30, 50, 80, 120] * 4, "keys": [[200, 100]], "nearkeys": [([150, 150], 0.002)], "maxcolumns": 2},
+    "tall": {"rows": 1000000, "columns": [100, 10000, 50000], "keys": [[1000, 1000]], "nearkeys": [], "maxcolumns": 3},
+    "nokey": {"rows": 200000, "columns": [3, 7, 20, 60, 150, 400, 1000, 2500], "keys": [], "nearkeys": [([1000, 150], 0.01)], "maxcolumns": 3},
+}
+
+
+def GenerateTable(rows, columns, keys, nearkeys, seed=0):
+    """
+    Creates a DataFrame with <rows> rows. <columns> lists the cardinality
+    of every random column. Every entry of <keys> plants a composite key:
+    its columns (with the given cardinalities, their product must be at
+    least <rows>) hold the mixed radix digits of a permutation of the row
+    numbers, so their combination is unique. Every entry of <nearkeys>
+    plants such a key as well, but copies the values of the given share
+    of rows from other rows, so it is only nearly unique.
+    """
+    generator = np.random.default_rng(seed)
+    data = {}
+    for i, cardinality in enumerate(columns):
+        data["col{}".format(i+1)] = generator.integers(0, cardinality, rows)
+
+    def planted(cardinalities):
+        product = 1
+        for c in cardinalities:
+            product *= c
+        if product < rows:
+            raise ValueError("The cardinalities of a planted key must multiply to at least the amount of rows")
+        remaining = generator.permutation(rows)
+        digits = []
+        for c in cardinalities:
+            digits.append(remaining % c)
+            remaining = remaining // c
+        return digits
+
+    for k, cardinalities in enumerate(keys):
+        for d, digits in enumerate(planted(cardinalities)):
+            data["key{}_{}".format(k+1, d+1)] = digits
+    for k, (cardinalities, share) in enumerate(nearkeys):
+        digits = planted(cardinalities)
+        duplicates = generator.choice(rows, int(rows * share), replace=False)
+        sources = generator.integers(0, rows, len(duplicates))
+        for d in range(len(digits)):
+            digits[d][duplicates] = digits[d][sources]
+            data["near{}_{}".format(k+1, d+1)] = digits[d]
+
+    # Shuffle the columns, so the keys are not always at the end
+    names = list(data)
+    generator.shuffle(names)
+    return pd.DataFrame({name: data[name] for name in names})
+
+
+def TimeScan(filepath, maxcolumns, precision=0.999):
+    """
+    Scans <filepath> with primarykey.KeySearch, like primarykey.Main()
+    and find_keys() do, and returns the seconds of every phase plus the
+    amount of keys (with their equivalent alternatives) and tested
+    combinations.
+    """
+    start_time = time.time()
+    data = primarykey.ReadTable(filepath, 1)
+    load = time.time() - start_time
+
+    start_time = time.time()
+    if isinstance(data, primarykey.EncodedTable):
+        table = data # .xlsb files are encoded while reading
+    else:
+        table = primarykey.EncodeColumns(data, range(data.shape[1]))
+    del data
+    encode = time.time() - start_time
+
+    start_time = time.time()
+    scan = primarykey.KeySearch(table, range(len(table.names)), maxcolumns, precision)
+    tested = 0
+
+    def counter(keycolumns, status, value):
+        nonlocal tested
+        if status == "tested":
+            tested += 1
+
+    keys = 0
+    for result in scan.Results(counter):
+        if result.key:
+            keys += 1 + len(scan.Alternatives(result))
+    search = time.time() - start_time
+    return {"load": load, "encode": encode, "search": search, "total": load + encode + search,
+            "rows": table.rows, "columns": len(table.names), "keys": keys, "tested": tested}
+
+
+def RunBenchmark(scale, repeat, formats, xlsbfiles):
+    """ Runs every workload in every format <repeat> times and keeps the fastest timings """
+    cases = []
+    with tempfile.TemporaryDirectory(prefix="primarykey-bench-") as directory:
+        for name, workload in WORKLOADS.items():
+            rows = max(int(workload["rows"] * scale), 1)
+            df = GenerateTable(rows, workload["columns"], workload["keys"], workload["nearkeys"])
+            for fmt in formats:
+                filepath = os.path.join(directory, "{}.{}".format(name, fmt))
+                if fmt == "csv":
+                    df.to_csv(filepath, index=False)
+                elif fmt == "xlsx":
+                    if rows > 1048575:
+                        print("Skipping {}.xlsx: too many rows for Excel".format(name))
+                        continue
+                    try:
+                        df.to_excel(filepath, index=False)
+                    except ImportError:
+                        print("Skipping {}.xlsx: openpyxl is not installed".format(name))
+                        continue
+                cases.append(("{}.{}".format(name, fmt), filepath, workload["maxcolumns"]))
+            del df
+
+        # pandas can not write .xlsb, so those have to be given by the user
+        for filepath in xlsbfiles:
+            cases.append((os.path.basename(filepath), filepath, 3))
+
+        results = []
+        for casename, filepath, maxcolumns in cases:
+            best = None
+            for i in range(repeat):
+                timings = TimeScan(filepath, maxcolumns)
+                if best is None or timings["total"] < best["total"]:
+                    best = timings
+            best["name"] = casename
+            best["maxcolumns"] = maxcolumns
+            results.append(best)
+            print("{:<16} {:>9} rows {:>4} cols | load {:>8.3f}s | encode {:>8.3f}s | search {:>8.3f}s | {} key(s)".format(
+                casename, best["rows"], best["columns"], best["load"], best["encode"], best["search"], best["keys"]))
+    return results
+
+
+def CompareResults(old, new, threshold):
+    """
+    Prints the change of every phase compared to <old> and returns the
+    amount of phases that got slower by more than <threshold> (ratio).
+    """
+    regressions = 0
+    previous = {case["name"]: case for case in old["cases"]}
+    print()
+    print("Compared to {} ({}):".format(old.get("version", "?"), old.get("date", "?")))
+    for case in new["cases"]:
+        if case["name"] not in previous:
+            continue
+        changes = []
+        for phase in ("load", "encode", "search", "total"):
+            before = previous[case["name"]][phase]
+            after = case[phase]
+            if before <= 0:
+                continue
+            change = (after - before) / before
+            flag = ""
+            # Ignore tiny absolute differences, they are just noise
+            if change > threshold and after - before > 0.05:
+                flag = " REGRESSION"
+                if phase != "total":
+                    regressions += 1
+            changes.append("{} {:+.1%}{}".format(phase, change, flag))
+        print("{:<16} {}".format(case["name"], " | ".join(changes)))
+    return regressions
+
+
+if __name__ == "__main__":
+    scale = 1.0 # multiplies the amount of rows of every workload
+    repeat = 3 # every case is timed <repeat> times, the fastest run counts
+    formats = ["csv", "xlsx"]
+    xlsbfiles = []
+    output = "benchmark_results.json"
+    compare = None
+    threshold = 0.10 # 10 % slower counts as regression
+
+    for i, arg in enumerate(sys.argv):
+        arg = arg.lower()
+        try:
+            if arg in ("-h", "--help", "-u", "--usage"):
+                print(USAGESTRING)
+                sys.exit(0)
+            elif arg == "--scale":
+                scale = float(sys.argv[i+1])
+            elif arg == "--repeat":
+                repeat = max(int(sys.argv[i+1]), 1)
+            elif arg == "--formats":
+                formats = [f for f in sys.argv[i+1].lower().split(",") if f]
+            elif arg == "--xlsb":
+                xlsbfiles.append(sys.argv[i+1])
+            elif arg == "--output":
+                output = sys.argv[i+1]
+            elif arg == "--compare":
+                compare = sys.argv[i+1]
+            elif arg == "--threshold":
+                threshold = float(sys.argv[i+1]) / 100.0
+        except (IndexError, ValueError):
+            print("ERROR: Invalid or no specifier given after", arg)
+            print(USAGESTRING)
+            sys.exit(1)
+
+    results = {"version": primarykey.__version__,
+               "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+               "python": platform.python_version(),
+               "pandas": pd.__version__,
+               "numpy": np.__version__,
+               "machine": platform.platform(),
+               "scale": scale,
+               "cases": RunBenchmark(scale, repeat, formats, xlsbfiles)}
+
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print("Results saved to", output)
+
+    if compare:
+        with open(compare) as f:
+            regressions = CompareResults(json.load(f), results, threshold)
+        if regressions:
+            print(regressions, "phase(s) got slower by more than {:.0%}".format(threshold))
+            sys.exit(1)
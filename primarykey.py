@@ -15,13 +15,45 @@ NAME: Primary Key Finder
 
 import sys
 import os
+import array
 import time
+import shutil
+import pickle
+import hashlib
+import csv
+import io
+import glob
+import json
+import bisect
+import heapq
 import itertools
+import collections
+import random
+import tempfile
+import mmap
+import multiprocessing
+import cProfile
+from multiprocessing import shared_memory
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from pyxlsb import open_workbook as open_xlsb
+try:
+    import resource # not available on Windows
+except ImportError:
+    resource = None
+try:
+    import pyarrow # optional, the fastest CSV reader
+except ImportError:
+    pyarrow = None
 
 EXCELTYPES = (".xls", ".xlsx", ".xlsb", ".csv")
-USAGESTRING = "primarykey --hilfe --help --usage | 'path\\to\excel.xlsx' [--worksheet <sheet>] [--range <n> <m>] [--columns <n>] [--precision <p>] [--sort <o>] [--verbose]"
+CHECKPOINTINTERVAL = 60 # seconds between two checkpoints of a scan (--checkpoint)
+SKETCHROWS = 163840 # 2.5 * 2^16, --approximate counts smaller tables exactly (see EvaluateCombination())
+SKETCHERRORS = 4 # standard errors of the sketch within which --approximate counts exactly
+SAMPLETRIAL = 100 # combinations in which the row sample has to prove that it rejects enough
+SKETCHTRIAL = 20 # sketched combinations in which the sketch has to prove that it spares enough exact counts
+USAGESTRING = "primarykey --hilfe --help --usage | 'path\\to\excel.xlsx' [--worksheet <sheet>] [--range <n> <m>] [--columns <n>] [--precision <p>] [--sort <o>] [--top <k>] [--duplicates <n>] [--duplicates-file <file>] [--time-budget <s>] [--discover] [--jobs <n>] [--memory <mb>] [--sample <n>] [--approximate] [--cache] [--state <file>] [--checkpoint [<file>]] [--resume] [--profile <file>] [--cprofile <file>] [--verbose] | --batch <dir|glob|list> [--report <file>] [--inclusions <file>] [...]"
 
 
 def HelpGerman():
@@ -82,12 +114,116 @@ PARAMETER:
                      3 = Zeigt einen Fortschrittsbalken an. Primärschlüssel und Pseudo-
                          Primärschlüssel werden am Ende sortiert ausgegeben. Nützlich
                          als Übersicht und für sortierte Ergebnisse.
+ --top <k>           Behält nur die <k> besten Pseudo-Primärschlüssel und gibt sie
+                     aus (Standard: 100). Der Speicherbedarf hängt nur von <k> ab,
+                     egal wie viele Kombinationen die --precision erreichen.
+ --duplicates <n>    Zeigt bei jedem Pseudo-Primärschlüssel die ersten <n> Gruppen von
+                     Zeilen mit denselben Werten (Zeilennummern und Werte), damit sie
+                     nicht von Hand gesucht werden müssen. Die Zeilennummern zählen
+                     die Kopfzeile als Zeile 1.
+ --duplicates-file <file>
+                     Speichert diese Gruppen als CSV Datei mit einer Zeile pro Zeile
+                     der Tabelle (Standard für --duplicates: 10).
+ --time-budget <s>   Sucht höchstens <s> Sekunden lang und testet die vielversprechendsten
+                     Kombinationen zuerst (Spalten mit vielen verschiedenen Werten und
+                     Kombinationen, die schon fast eindeutig sind), statt alle der Reihe
+                     nach. Gefundene Primärschlüssel werden auf die nötigen Spalten
+                     reduziert. Am Ende steht, ob wirklich alle Kombinationen getestet
+                     wurden. Nützlich für sehr breite Tabellen.
+ --discover          Findet alle minimalen Primärschlüssel mit beliebig vielen Spalten,
+                     --columns wird ignoriert. Statt alle Kombinationen zu testen,
+                     läuft die Suche zufällig durch die Kombinationen und schließt
+                     von jeder getesteten auf ihre Ober- bzw. Teilmengen. Findet
+                     auch Schlüssel aus 5 oder 6 Spalten. Sucht keine Pseudo-
+                     Primärschlüssel.
+ --jobs <n>          Verteilt die Spaltenkombinationen auf <n> Prozesse (Standard: 1).
+                     Die Ergebnisse werden trotzdem in derselben Reihenfolge
+                     ausgegeben. Nützlich für große Tabellen auf Rechnern mit
+                     mehreren Prozessorkernen.
+ --memory <mb>       Nur für CSV Dateien: Liest die Datei in Blöcken statt komplett
+                     in den Arbeitsspeicher und nutzt höchstens etwa <mb> Megabyte
+                     für Zeilendaten. Zwischenergebnisse werden in temporäre
+                     Dateien ausgelagert. Nützlich für Dateien, die größer als
+                     der Arbeitsspeicher sind.
+ --sample <n>        Jede Spaltenkombination wird zuerst an <n> zufälligen Zeilen
+                     getestet (Standard: 10000, 0 schaltet es ab). Hat die Stichprobe
+                     schon zu viele Duplikate, wird die Kombination verworfen, ohne
+                     alle Zeilen zu lesen. Mit --memory werden die ersten <n>
+                     Zeilen verwendet. Verwirft die Stichprobe kaum Kombinationen
+                     (meist bei hoher --precision), wird sie abgeschaltet. Das
+                     Ergebnis ändert sich dadurch nicht.
+ --approximate       Schätzt die Präzision der Pseudo-Primärschlüssel mit einem
+                     HyperLogLog Sketch (Fehler ca. ±0,4%) statt sie exakt zu
+                     zählen. Nur die besten --top Vorschläge werden am Ende exakt
+                     nachgezählt und ausgegeben. Tabellen bis 163840 Zeilen werden
+                     immer exakt gezählt. Bei größeren wird eine Kombination nur
+                     exakt gezählt, wenn die Schätzung nahe an der Zeilenanzahl
+                     liegt, sodass ein Primärschlüssel mit einer Wahrscheinlichkeit
+                     unter 0,01% übersehen wird. Vorschläge werden auch mit --sort 2 erst
+                     am Ende ausgegeben. Wirkt nur mit --memory, wenn die Hashes
+                     einer Kombination nicht in den Speicher passen (sonst ist
+                     exaktes Zählen schneller). Muss die Mehrzahl der ersten 20
+                     geschätzten Kombinationen ohnehin exakt gezählt werden,
+                     wird der Sketch abgeschaltet.
+ --cache [<mb>]      Speichert die eingelesene und kodierte Tabelle in einem Cache
+                     auf der Festplatte (%PRIMARYKEY_CACHE% oder ~/.cache/primarykey).
+                     Weitere Scans derselben Datei und desselben Arbeitsblatts
+                     (z. B. mit anderem --range) starten dann ohne erneutes
+                     Einlesen. Der Cache wird ungültig, sobald die Datei geändert
+                     wird. <mb> begrenzt die Größe des Caches (Standard: 2048);
+                     die am längsten nicht genutzten Einträge werden gelöscht.
+ --state <file>     Speichert die gefundenen Schlüssel, die besten Vorschläge und
+                     einen Hash-Index jedes Schlüssels und jedes ausgegebenen
+                     Vorschlags in <file>. Wurden seitdem nur
+                     Zeilen angehängt, prüft der nächste Scan mit derselben <file>
+                     nur die neuen Zeilen gegen die gespeicherten Schlüssel und
+                     aktualisiert die Präzision der Vorschläge. Komplett neu
+                     gesucht wird nur, wenn ein Primärschlüssel nicht mehr gilt
+                     oder sich alte Zeilen oder Parameter geändert haben.
+ --checkpoint [<file>]
+                     Speichert jede Minute und beim Abbrechen (Strg+C) den Fortschritt
+                     des Scans, die gefundenen Schlüssel und die besten Vorschläge in
+                     <file> (Standard: <Datei>.checkpoint). Nach einem vollständigen
+                     Scan wird <file> gelöscht. Die Tabelle wird für --resume im
+                     --cache gespeichert (wird eingeschaltet).
+ --resume            Setzt einen abgebrochenen Scan am letzten --checkpoint fort,
+                     statt von vorne zu beginnen. Die Tabelle wird dafür aus dem
+                     --cache gelesen (wird eingeschaltet). Wurde die Datei oder ein
+                     Parameter geändert, beginnt der Scan von vorne.
+ --profile <file>    Speichert die Dauer jeder Phase (Öffnen, Kodieren, Suche, ...)
+                     und je Spaltenanzahl die Menge der getesteten, verworfenen und
+                     gefundenen Kombinationen, deren Dauer, die in den Partitionen
+                     verarbeiteten Zeilen und den maximalen Speicherbedarf des
+                     Haupt- und des größten Arbeitsprozesses als JSON in <file>.
+                     Die Datei kann auch in chrome://tracing oder ui.perfetto.dev
+                     geöffnet werden.
+ --cprofile <file>   Profiliert nur die Suche nach Schlüsseln mit cProfile und
+                     speichert die Statistik in <file> (python -m pstats <file>).
+                     Mit --jobs wird nur der Hauptprozess profiliert, nicht die
+                     Prozesse, die die Kombinationen testen.
+ --batch <path>      Statt einer Datei werden alle Arbeitsblätter aller Tabellendateien
+                     gescannt: <path> ist ein Ordner (inkl. Unterordner), ein
+                     Suchmuster (z. B. "daten/*.xlsx") oder eine .txt/.lst Datei
+                     mit einem Dateipfad pro Zeile. Muss der erste Parameter sein.
+                     Jede Datei wird nur einmal geöffnet; --jobs Prozesse lesen
+                     und scannen die Tabellen, die größten zuerst. Die anderen
+                     Parameter gelten für jede Tabelle (außer --worksheet, --range,
+                     --sort, --memory und --verbose).
+ --report <file>     Nur mit --batch: Speichert alle Ergebnisse in <file> (.csv oder
+                     .json, Standard: primarykey_report.csv).
+ --inclusions <file> Nur mit --batch: Sucht außerdem Inklusionsabhängigkeiten zwischen
+                     den Tabellen, also Spalten, deren Werte alle in einer Spalte
+                     einer anderen Tabelle vorkommen (mögliche Fremdschlüssel), und
+                     Spaltenkombinationen, deren Werte alle in einem mehrspaltigen
+                     Primärschlüssel einer anderen Tabelle vorkommen. Speichert sie
+                     in <file> (.csv oder .json). Leere Zellen werden nicht beachtet,
+                     konstante Spalten nur als Teil einer Spaltenkombination.
  --verbose           Druckt jede einzelne Spaltenkombination. Wird ignoriert,
                      wenn --sort 3 aktiv ist.
  --help              Zeigt diese Hilfemeldung in Englisch an.
  --hilfe             Zeigt diese Hilfemeldung an.
  --usage             Zeigt die Befehlssyntax an.
- Jeder Parameter kann mit einem Bindestrich und dem ersten Buchstaben abgekürzt werden.
+ Fast jeder Parameter kann mit einem Bindestrich und dem ersten Buchstaben abgekürzt werden.
 
 Unterstützte Dateitypen:
  {1}
@@ -156,12 +292,117 @@ PARAMETERS:
                      3 = Shows a progressbar. Primarykeys and Pseudo-
                          Primarykeys are printed sorted at the end.
                          Useful as overview and for sorted results.
+ --top <k>           Keeps and prints only the <k> best pseudo-primary-keys
+                     (default: 100). The memory needed depends on <k> only, no
+                     matter how many combinations reach the --precision.
+ --duplicates <n>    Shows the first <n> groups of rows with the same values
+                     (row numbers and values) for every pseudo-primary-key,
+                     so they do not have to be searched by hand. The row
+                     numbers count the header as row 1.
+ --duplicates-file <file>
+                     Saves these groups as CSV file with one line per row
+                     of the table (default for --duplicates: 10).
+ --time-budget <s>   Searches for at most <s> seconds and tests the most
+                     promising combinations first (columns with many distinct
+                     values and combinations that are almost unique already)
+                     instead of all of them in order. Found primary keys are
+                     reduced to the columns they need. The output tells
+                     whether every combination was tested. Useful for very
+                     wide tables.
+ --discover          Finds all minimal primary keys of any width, --columns
+                     is ignored. Instead of testing every combination the
+                     search walks randomly through them and infers the
+                     uniqueness of supersets and subsets from every tested
+                     one. Finds keys of 5 or 6 columns as well. Does not
+                     search pseudo-primary-keys.
+ --jobs <n>          Spreads the column combinations over <n> processes
+                     (Default: 1). The results are still printed in the
+                     same order. Useful for big tables on machines with
+                     multiple cores.
+ --memory <mb>       CSV files only: Reads the file in chunks instead of
+                     loading it completely and uses roughly <mb> megabytes
+                     at most for row data. Intermediate data is spilled
+                     to temporary files. Useful for files that are
+                     larger than the available memory.
+ --sample <n>        Every combination is tested on <n> random rows first
+                     (Default: 10000, 0 turns it off). If the sample
+                     already has too many duplicates, the combination is
+                     rejected without reading all rows. With --memory the
+                     first <n> rows are used. The sample is switched off
+                     when it rejects hardly any combination (usually with
+                     a high --precision). Does not change the result.
+ --approximate       Estimates the precision of pseudo-primary-keys with a
+                     HyperLogLog sketch (error about ±0.4%) instead of
+                     counting it exactly. Only the best --top suggestions
+                     are counted exactly at the end and printed. Tables of
+                     up to 163840 rows are always counted exactly. In larger
+                     ones a combination is only counted exactly when its
+                     estimate is close to the amount of rows, so a primary
+                     key is missed with a probability below 0.01%.
+                     Suggestions are
+                     printed at the end even with --sort 2. Only applies
+                     with --memory, when the hashes of a combination do
+                     not fit into the memory (otherwise exact counting is
+                     faster). The sketch is switched off when most of the
+                     first 20 estimated combinations have to be counted
+                     exactly anyway.
+ --cache [<mb>]      Stores the parsed and encoded table in a cache on
+                     disk ($PRIMARYKEY_CACHE or ~/.cache/primarykey).
+                     Further scans of the same file and worksheet (e.g.
+                     with another --range) start without parsing it
+                     again. An entry expires as soon as the file is
+                     modified. <mb> limits the size of the cache
+                     (Default: 2048); the least recently used entries
+                     are removed first.
+ --state <file>     Saves the found keys, the best suggestions and a hash index
+                     of every key and every printed suggestion to <file>. If rows were only appended since,
+                     the next scan with the same <file> just checks the new rows
+                     against the saved keys and updates the precision of the
+                     suggestions. The table is only searched again if a primary
+                     key does not hold anymore or old rows or parameters changed.
+ --checkpoint [<file>]
+                     Saves the progress of the scan, the found keys and the best
+                     suggestions to <file> (default: <file>.checkpoint) every
+                     minute and when the scan is cancelled (Ctrl+C). <file> is
+                     deleted when the scan is complete. The table is stored in
+                     the --cache for --resume (which is turned on).
+ --resume            Continues a stopped scan at the last --checkpoint instead
+                     of starting over. The table is read from the --cache
+                     (which is turned on). If the file or a parameter changed,
+                     the scan starts over.
+ --profile <file>    Saves the duration of every phase (opening, encoding, search,
+                     ...) and per amount of columns the number of tested, skipped
+                     and found combinations, their duration, the rows processed
+                     by the partitions and the peak memory of the main and the
+                     largest worker process as JSON to <file>. The file can also
+                     be opened in chrome://tracing or ui.perfetto.dev.
+ --cprofile <file>   Profiles only the search for keys with cProfile and saves
+                     the statistics to <file> (python -m pstats <file>).
+                     With --jobs only the main process is profiled, not the
+                     worker processes that test the combinations.
+ --batch <path>      Scans every worksheet of many table files instead of a
+                     single file: <path> is a directory (including subdirectories),
+                     a glob pattern (e.g. "data/*.xlsx") or a .txt/.lst file with
+                     one file path per line. Has to be the first parameter. Every
+                     file is opened only once; --jobs processes read and scan the
+                     tables, largest first. The other parameters apply to every
+                     table (except --worksheet, --range, --sort, --memory and
+                     --verbose).
+ --report <file>     Only with --batch: saves all results to <file> (.csv or .json,
+                     default: primarykey_report.csv).
+ --inclusions <file> Only with --batch: also searches inclusion dependencies
+                     between the tables, ie. columns whose values all appear
+                     in a column of another table (possible foreign keys),
+                     and column combinations whose values all appear in a
+                     multi-column primary key of another table. Saves them
+                     to <file> (.csv or .json). Empty cells are left out,
+                     constant columns only count as part of a combination.
  --verbose           Prints every single combination of columns. Will be
                      ignored when --sort 3 is enabled.
  --help              Shows this help message.
  --hilfe             Shows help message in German.
  --usage             Shows the command syntax.
- Every paramater can be abbreviated with one dash and its first letter.
+ Almost every paramater can be abbreviated with one dash and its first letter.
  
 SUPPORTED FILE TYPES:
  {1}
@@ -191,7 +432,8 @@ def ProgressBar(achieved, total, prefix="", suffix=""):
     progr_graph = "{}{}".format(blocks*block, post_space*space)
     
     progress = int(achieved/total*100)
-    print("{}|{}|{}%| ({} of {} {})".format(prefix, progr_graph, progress, achieved, int(total), suffix), end="\r")
+    # Trailing spaces overwrite the rest of a longer previous line (e.g. the ETA in <suffix>)
+    print("{}|{}|{}%| ({} of {} {})    ".format(prefix, progr_graph, progress, achieved, int(total), suffix), end="\r")
     
     
 def ConvertSeconds(time, precision=0):
@@ -219,10 +461,13 @@ def IndexToExcelLetter(index):
     return letterindex
 
 
-def PredictCombinations(items, n):
+def PredictCombinations(items, n, cardinalities=None, minimum=0):
     """
     Calculates the amount of combinations of <items> from
-    length 1 to <n> without repition and order.
+    length 1 to <n> without repition and order. Returns the
+    total and the amount of combinations that survive the
+    cardinality pruning (see ViableCombination()) when the
+    <cardinalities> of the columns are given.
     """
     def faculty(number):
         faculty = 1
@@ -231,21 +476,1825 @@ def PredictCombinations(items, n):
         return faculty
     
     def binomial_coefficient(k, n):
-        return faculty(n) / (faculty(n-k)*faculty(k))
+        return faculty(n) // (faculty(n-k)*faculty(k))
 
     combinations = 0
     for i in range(1, n+1):
         combinations += binomial_coefficient(i, len(items)) 
-    return int(combinations)
+    if cardinalities is None or minimum <= 1:
+        return [combinations, combinations]
+    
+    # Count the surviving combinations without enumerating the pruned ones.
+    # With the cardinalities sorted in descending order every branch can
+    # stop as soon as its largest reachable product falls below <minimum>.
+    cards = sorted([cardinalities[c] for c in items], reverse=True)
+    negcards = [-c for c in cards] # ascending, for bisect
+    
+    def count(start, width, product):
+        if width == 1:
+            needed = -(-minimum // product) # ceil division
+            return bisect.bisect_right(negcards, -needed, lo=start) - start
+        total = 0
+        for i in range(start, len(cards) - width + 1):
+            bound = product
+            for c in cards[i:i+width]:
+                bound *= c
+            if bound < minimum:
+                break
+            total += count(i+1, width-1, product*cards[i])
+        return total
+    
+    surviving = 0
+    for i in range(1, n+1):
+        surviving += count(0, i, 1)
+    return [combinations, surviving]
+
+
+def MinimumDistinct(rows, precision):
+    """
+    Returns the smallest amount of distinct combinations <d> for which
+    d/rows >= <precision>, ie. the minimum for a (pseudo-)primary key.
+    """
+    if precision >= 1:
+        return rows
+    minimum = max(int(precision * rows), 0)
+    while minimum > 0 and (minimum - 1) / rows >= precision:
+        minimum -= 1
+    while minimum < rows and minimum / rows < precision:
+        minimum += 1
+    return minimum
+
+
+def ViableCombination(keycolumns, cardinalities, minimum):
+    """
+    A combination can never have more distinct values than the product
+    of the distinct values of its columns. If that product is below
+    <minimum> the combination can be rejected without scanning rows.
+    """
+    product = 1
+    for c in keycolumns:
+        product *= cardinalities[c]
+        if product >= minimum:
+            return True
+    return product >= minimum
+
+
+def FindKeySubset(keycolumns, keyindex):
+    """
+    Returns the found primary key in <keyindex> (a set of column tuples)
+    that is a subset of <keycolumns> or None. Only the subsets of
+    <keycolumns> are looked up, so the cost does not grow with the
+    amount of keys found.
+    """
+    if not keyindex:
+        return None
+    for width in range(1, len(keycolumns)):
+        for subset in itertools.combinations(keycolumns, width):
+            if subset in keyindex:
+                return subset
+    return None
+
+
+def ColumnCombinations(items, n):
+    """ Wrapper for itertools.combinations() to suit our need """
+    for i in range(1, n+1):
+        for b in itertools.combinations(items, i):
+            yield b
+            
+            
+class EncodedTable:
+    """
+    A table whose columns are factorized into dense integer codes. The
+    value in row <r> of column <c> is uniques[c][codes[c][r]]. Columns
+    that were not encoded are None in <codes>, <uniques> and
+    <cardinalities> (the amount of distinct values per column).
+    <uniques> can also be a function that loads them on first use, in
+    which case the <cardinalities> must be given.
+    """
+    def __init__(self, names, rows, codes, uniques, cardinalities=None):
+        self.names = names
+        self.rows = rows
+        self.codes = codes
+        self._uniques = uniques
+        if cardinalities is None:
+            cardinalities = [None if u is None else len(u) for u in uniques]
+        self.cardinalities = cardinalities
+        self._valuehashes = {}
+    
+    @property
+    def uniques(self):
+        if callable(self._uniques):
+            self._uniques = self._uniques()
+        return self._uniques
+    
+    def Hashes(self, keycolumns, start, stop):
+        """
+        Returns a 64 bit hash of the values of <keycolumns> for the rows
+        <start> to <stop>. Unlike the codes, the hashes stay the same when
+        rows are appended to the table.
+        """
+        hashes = None
+        for c in keycolumns:
+            if c not in self._valuehashes:
+                self._valuehashes[c] = pd.util.hash_array(np.array([str(u) for u in self.uniques[c]], dtype=object))
+            values = self._valuehashes[c][self.codes[c][start:stop]]
+            hashes = values if hashes is None else MixHashes(hashes, values)
+        return hashes
+
+
+def EncodeColumns(df, columnlist, names=None):
+    """
+    Factorizes every column in <columnlist> once into dense integer
+    codes (0 to n-1) and returns them as EncodedTable. If the <names> of
+    all columns are given, <df> only holds the columns in <columnlist>
+    (in that order) and the others are left out of the EncodedTable.
+    """
+    if names is None:
+        names = list(df.columns)
+        positions = columnlist
+    else:
+        positions = range(df.shape[1])
+    codes = [None] * len(names)
+    uniques = [None] * len(names)
+    for p, c in zip(positions, columnlist):
+        # use_na_sentinel=False keeps empty cells as a value of their own
+        colcodes, uniques[c] = pd.factorize(df.iloc[:, p], use_na_sentinel=False)
+        codes[c] = colcodes.astype(np.int64, copy=False)
+    return EncodedTable(names, df.shape[0], codes, uniques)
+
+
+def ReadXlsbSheet(sheet, usecols=None, headeronly=False):
+    """
+    Reads a pyxlsb <sheet> in a single pass straight into an EncodedTable.
+    The first row holds the column names. Every cell value is looked up
+    in a per-column dictionary and only its integer code is appended to
+    a typed buffer, so no list of rows or DataFrame is ever built. Only
+    the cells of the columns in <usecols> (starting at 0) are looked at,
+    the others are left out. <headeronly> stops after the column names.
+    """
+    names = None
+    lookups = {} # one dictionary value -> code per column
+    buffers = {} # one array of codes per column
+    rows = 0
+    for r in sheet.rows(sparse=True):
+        if names is None:
+            names = [c.v for c in r]
+            if headeronly:
+                break
+            if usecols is None:
+                usecols = range(len(names))
+            lookups = {c: {} for c in usecols}
+            buffers = {c: array.array("q") for c in usecols}
+            continue
+        for c, lookup in lookups.items():
+            value = r[c].v
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(lookup)
+            buffers[c].append(code)
+        rows += 1
+    if names is None:
+        names = []
+    codes = [None] * len(names)
+    uniques = [None] * len(names)
+    for c, lookup in lookups.items():
+        codes[c] = np.frombuffer(buffers[c], dtype=np.int64) if len(buffers[c]) else np.zeros(0, dtype=np.int64)
+        uniques[c] = np.array(list(lookup), dtype=object)
+    return EncodedTable(names, rows, codes, uniques)
+
+
+class WorksheetNotFound(Exception):
+    """ Raised by ReadTable() when the workbook has no such worksheet """
+
+
+def ListWorksheets(filepath):
+    """ Returns the names of all worksheets of a workbook. CSV files have just one """
+    if filepath.endswith(".xlsb"):
+        with open_xlsb(filepath) as wb:
+            return list(wb.sheets)
+    if filepath.endswith((".xls", ".xlsx")):
+        return list(pd.ExcelFile(filepath).sheet_names)
+    return [1]
+
+
+def CsvOptions(filepath, size=1 << 16):
+    """
+    Guesses the separator and quote character of a CSV file from its
+    first <size> bytes, like pandas does for sep=None, but without
+    having to parse the whole file with the slow python engine. Returns
+    the options for pd.read_csv(). Only the usual separators are
+    considered, otherwise the sniffer takes eg. the "-" of ISO dates in a
+    single column for one. Files the sniffer can not guess, or whose
+    header line does not contain the guessed separator, are read as comma
+    separated.
+    """
+    with open(filepath, "rb") as f:
+        prefix = f.read(size).decode("utf-8", errors="replace")
+    if len(prefix) >= size and "\n" in prefix:
+        prefix = prefix[:prefix.rindex("\n")] # the last line may be cut off
+    try:
+        dialect = csv.Sniffer().sniff(prefix, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    if dialect.delimiter not in prefix.split("\n", 1)[0]:
+        dialect = csv.excel # eg. a single column whose values contain a "|"
+    return {"sep": dialect.delimiter, "quotechar": dialect.quotechar, "skipinitialspace": dialect.skipinitialspace}
+
+
+def ReadCsv(filepath, usecols=None, dtype=None, partsize=1 << 26):
+    """
+    Reads a CSV file with the fastest engine there is: pyarrow, which
+    parses with several threads, if it is installed and otherwise the C
+    engine. Files larger than two <partsize> bytes are instead split at
+    line ends and the parts are parsed by several threads (see
+    ReadCsvParts()), so only the parts being parsed hold 64 bit integers
+    at a time. The integer columns are downcast (see CompactColumns()).
+    """
+    options = CsvOptions(filepath)
+    names = list(pd.read_csv(filepath, engine="c", nrows=0, **options).columns)
+    if os.path.getsize(filepath) > 2 * partsize:
+        with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            quoted = data.find(options["quotechar"].encode("utf-8")) >= 0
+        # Quoted values can contain line breaks anywhere in the file, so only
+        # a file without any quotes can be split at any line end
+        if not quoted:
+            try:
+                return ReadCsvParts(filepath, options, usecols, dtype, partsize)
+            except pd.errors.ParserError:
+                pass # eg. escaped line breaks, the single read below handles them
+    # pyarrow needs unique column names to select columns
+    if pyarrow is not None and not options["skipinitialspace"] and len(set(names)) == len(names):
+        del options["skipinitialspace"] # not supported by pyarrow
+        usenames = None if usecols is None else [names[p] for p in sorted(usecols)]
+        return CompactColumns(pd.read_csv(filepath, engine="pyarrow", usecols=usenames, dtype=dtype, **options))
+    return CompactColumns(pd.read_csv(filepath, engine="c", usecols=usecols, dtype=dtype, **options))
+
+
+def ReadCsvParts(filepath, options, usecols, dtype, partsize):
+    """
+    Splits the CSV file at the first line end after every <partsize>
+    bytes and parses the parts with a pool of threads, since the C
+    engine releases the GIL while parsing. The integer columns of every
+    part are downcast right after parsing it. Every part infers its types on its
+    own, so columns that are text in one part and numbers or booleans
+    in another are parsed again as text, like a single read does. The
+    categories of <dtype> are unified across the parts.
+    """
+    names = list(pd.read_csv(filepath, engine="c", nrows=0, **options).columns)
+    size = os.path.getsize(filepath)
+    with open(filepath, "rb") as f:
+        f.readline() # the header
+        bounds = [f.tell()]
+        while bounds[-1] < size:
+            f.seek(min(bounds[-1] + partsize, size))
+            f.readline()
+            bounds.append(f.tell())
+    positions = list(range(len(names))) if usecols is None else sorted(usecols)
+    types = {p: dtype[names[p]] for p in positions if dtype and names[p] in dtype}
+    
+    def Parse(part, columns, types):
+        with open(filepath, "rb") as f:
+            f.seek(part[0])
+            data = f.read(part[1] - part[0])
+        return CompactColumns(pd.read_csv(io.BytesIO(data), engine="c", header=None, usecols=columns, dtype=types, **options))
+    
+    def Kind(values):
+        if values.isna().all():
+            return None # fits any type
+        if pd.api.types.is_bool_dtype(values):
+            return "bool"
+        return "number" if pd.api.types.is_numeric_dtype(values) else "text"
+    
+    spans = [span for span in zip(bounds, bounds[1:]) if span[1] > span[0]]
+    with ThreadPoolExecutor(min(32, os.cpu_count() or 1)) as pool:
+        parts = list(pool.map(lambda span: Parse(span, positions, types), spans))
+        mixed = [p for p in positions if p not in types and len(set(Kind(part[p]) for part in parts) - {None}) > 1]
+        if mixed:
+            texts = list(pool.map(lambda span: Parse(span, mixed, {p: str for p in mixed}), spans))
+            for part, text in zip(parts, texts):
+                for p in mixed:
+                    part[p] = text[p]
+    
+    for p in types:
+        if types[p] == "category":
+            categories = pd.api.types.union_categoricals([part[p] for part in parts]).categories
+            for part in parts:
+                part[p] = part[p].cat.set_categories(categories)
+    df = pd.concat(parts, ignore_index=True)
+    df.columns = [names[p] for p in positions]
+    return df
+
+
+def CompactColumns(df):
+    """
+    Downcasts integer columns of <df> to the smallest integer type that
+    holds their values. Floats are kept, since fewer bits could merge
+    distinct values.
+    """
+    for column in df.columns[[pd.api.types.is_integer_dtype(t) for t in df.dtypes]]:
+        df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+def ReadTable(filepath, sheetname, headeronly=False, usecols=None):
+    """
+    Reads the worksheet <sheetname> (name or number starting at 1) of a
+    table file. Returns an EncodedTable for .xlsb files (which are encoded
+    while reading) and a DataFrame for all other types. <headeronly> only
+    reads the column names into an empty DataFrame. <usecols> (column
+    positions starting at 0) only reads and encodes these columns and
+    returns an EncodedTable for every type, in which the other columns
+    are left out.
+    """
+    if filepath.endswith(".xlsb"):
+        with open_xlsb(filepath) as wb:
+            try:
+                sheet = wb.get_sheet(sheetname)
+            except (ValueError, IndexError):
+                raise WorksheetNotFound(sheetname)
+            with sheet:
+                table = ReadXlsbSheet(sheet, usecols, headeronly)
+        return pd.DataFrame(columns=table.names) if headeronly else table
+    
+    elif filepath.endswith((".xls", ".xlsx")):
+        if isinstance(sheetname, int):
+            sheetname = sheetname-1
+        try:
+            if headeronly:
+                return pd.read_excel(filepath, sheet_name=sheetname, nrows=0)
+            names = list(pd.read_excel(filepath, sheet_name=sheetname, nrows=0).columns) if usecols is not None else None
+            df = CompactColumns(pd.read_excel(filepath, sheet_name=sheetname, usecols=usecols))
+        except (ValueError, IndexError, KeyError):
+            raise WorksheetNotFound(sheetname)
+    
+    elif headeronly:
+        return pd.read_csv(filepath, engine="c", dtype=str, nrows=0, **CsvOptions(filepath))
+    
+    else:
+        # Columns with text in the first rows are text in every row, so they are
+        # read straight into categories instead of one string object per cell
+        options = CsvOptions(filepath)
+        sample = pd.read_csv(filepath, engine="c", usecols=usecols, nrows=1000, **options)
+        names = list(pd.read_csv(filepath, engine="c", nrows=0, **options).columns) if usecols is not None else None
+        dtypes = {c: "category" for c, t in sample.dtypes.items() if not (pd.api.types.is_numeric_dtype(t) or pd.api.types.is_bool_dtype(t))}
+        df = ReadCsv(filepath, usecols, dtypes)
+    
+    if usecols is None:
+        return df
+    return EncodeColumns(df, sorted(usecols), names)
+
+
+def CacheDirectory():
+    """ Returns the directory of the table cache (--cache) """
+    return os.environ.get("PRIMARYKEY_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "primarykey"))
+
+
+def CacheKey(filepath, sheetname):
+    """
+    Returns the cache key of a worksheet. It changes whenever the file
+    is modified, so a stale table is never read from the cache.
+    """
+    stat = os.stat(filepath)
+    identity = repr((os.path.abspath(filepath), str(sheetname), stat.st_mtime_ns, stat.st_size, __version__))
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+
+def LoadCachedTable(directory, key):
+    """
+    Returns the cached EncodedTable for <key> or None. The codes are
+    memory-mapped, so loading takes the same time for any table size.
+    The unique values are only unpickled when they are needed.
+    """
+    entry = os.path.join(directory, key)
+    try:
+        with open(os.path.join(entry, "meta.pkl"), "rb") as f:
+            meta = pickle.load(f)
+        matrix = np.load(os.path.join(entry, "codes.npy"), mmap_mode="r")
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+        return None
+    os.utime(entry) # mark as recently used for the LRU eviction
+    
+    def uniques():
+        with open(os.path.join(entry, "uniques.pkl"), "rb") as f:
+            return pickle.load(f)
+    
+    codes = [matrix[c] for c in range(matrix.shape[0])]
+    return EncodedTable(meta["names"], meta["rows"], codes, uniques, meta["cardinalities"])
+
+
+def StoreCachedTable(directory, key, table, limit):
+    """
+    Stores the fully encoded <table> under <key> and evicts the least
+    recently used entries until the cache is at most <limit> bytes.
+    """
+    size = len(table.names) * table.rows * 8
+    if size > limit:
+        return
+    os.makedirs(directory, exist_ok=True)
+    temporary = tempfile.mkdtemp(prefix=".tmp-", dir=directory)
+    try:
+        matrix = np.lib.format.open_memmap(os.path.join(temporary, "codes.npy"), mode="w+", dtype=np.int64, shape=(len(table.names), table.rows))
+        for c, codes in enumerate(table.codes):
+            matrix[c] = codes
+        matrix.flush()
+        del matrix
+        with open(os.path.join(temporary, "uniques.pkl"), "wb") as f:
+            pickle.dump(list(table.uniques), f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(temporary, "meta.pkl"), "wb") as f:
+            pickle.dump({"names": table.names, "rows": table.rows, "cardinalities": table.cardinalities}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        entry = os.path.join(directory, key)
+        if os.path.isdir(entry):
+            shutil.rmtree(entry)
+        os.rename(temporary, entry)
+    except OSError:
+        shutil.rmtree(temporary, ignore_errors=True)
+        return
+    EvictCache(directory, limit)
+
+
+def EvictCache(directory, limit):
+    """ Removes the least recently used cache entries until at most <limit> bytes are used """
+    entries = []
+    for name in os.listdir(directory):
+        entry = os.path.join(directory, name)
+        if name.startswith(".") or not os.path.isdir(entry):
+            continue
+        size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+        entries.append([os.path.getmtime(entry), size, entry])
+    entries.sort()
+    total = sum(e[1] for e in entries)
+    for mtime, size, entry in entries:
+        if total <= limit:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+
+
+def CountDistinct(codes, cardinalities, keycolumns):
+    """
+    Counts the distinct value combinations of <keycolumns>. The codes of
+    all columns are mixed into one integer per row, where every column is
+    a digit of a mixed radix number. Different combinations can therefore
+    never collide (unlike concatenated strings: "1"+"23" == "12"+"3").
+    """
+    mixed = codes[keycolumns[0]]
+    radix = cardinalities[keycolumns[0]]
+    if len(keycolumns) == 1:
+        return radix
+    for c in keycolumns[1:]:
+        if radix * cardinalities[c] >= 2**62:
+            # Compress the mixed codes before the radix overflows int64
+            mixed, uniques = pd.factorize(mixed)
+            radix = len(uniques)
+        mixed = mixed * cardinalities[c] + codes[c]
+        radix *= cardinalities[c]
+    if radix <= 4 * len(mixed):
+        # Small code space: counting occupied slots beats hashing
+        return int(np.count_nonzero(np.bincount(mixed, minlength=radix)))
+    return len(pd.unique(mixed))
+
+
+def StrippedPartition(codes, cardinality):
+    """
+    Creates the stripped partition of one column. A partition groups
+    the rows by their values. Stripped means that groups of just one
+    row are dropped, since they can never become duplicates again.
+    Returns the row indexes, the group id of every row and the amount
+    of groups.
+    """
+    counts = np.bincount(codes, minlength=cardinality)
+    rowindexes = np.flatnonzero(counts[codes] > 1)
+    return (rowindexes, codes[rowindexes], int(np.count_nonzero(counts > 1)))
+
+
+def RefinePartition(partition, codes, cardinality):
+    """
+    Refines the stripped <partition> of a column combination by one more
+    column, which gives the stripped partition of the superset. Only the
+    rows that are still part of a group are touched.
+    """
+    rowindexes, groups, _ = partition
+    if len(rowindexes) == 0:
+        return partition
+    mixed = groups * cardinality + codes[rowindexes]
+    newgroups, uniques = pd.factorize(mixed)
+    counts = np.bincount(newgroups, minlength=len(uniques))
+    keep = counts[newgroups] > 1
+    return (rowindexes[keep], newgroups[keep], int(np.count_nonzero(counts > 1)))
+
+
+class PartitionLattice:
+    """
+    Evaluates column combinations by partition refinement (TANE-style).
+    The partition of (A, B, C) is created from the partition of its
+    prefix (A, B), so no combination is computed from scratch. Since
+    ColumnCombinations() yields all combinations with the same prefix
+    one after another, only the current chain of prefixes (one
+    partition per width) needs to be kept in memory.
+    
+    With a <samplesize> every combination is first counted on a random
+    sample of rows (see MaximumDistinct()).
+    """
+    def __init__(self, codes, cardinalities, rows, samplesize=0):
+        self.codes = codes
+        self.cardinalities = cardinalities
+        self.rows = rows
+        self.chain = {} # width -> (keycolumns, partition)
+        self.samplecodes = None
+        self.samplesize = samplesize if 0 < samplesize < rows else 0
+        self.sampled = 0 # combinations counted on the sample, see SampleRejects()
+        self.rejected = 0
+        self.sketched = 0 # combinations estimated with a sketch, see SketchSpares()
+        self.recounted = 0
+        self.touched = 0 # rows handled by partitions, samples and sketches (see ScanProfile)
+        if self.samplesize:
+            # Fixed seed, so every worker process draws the same sample
+            sample = np.sort(np.random.default_rng(0).choice(rows, samplesize, replace=False))
+            self.samplecodes = [None if c is None else c[sample] for c in codes]
+        
+    def Partition(self, keycolumns):
+        """ Returns the stripped partition of <keycolumns> """
+        cached = self.chain.get(len(keycolumns))
+        if cached is not None and cached[0] == keycolumns:
+            return cached[1]
+        last = keycolumns[-1]
+        if len(keycolumns) == 1:
+            partition = StrippedPartition(self.codes[last], self.cardinalities[last])
+            self.touched += self.rows
+        else:
+            prefix = self.Partition(keycolumns[:-1])
+            partition = RefinePartition(prefix, self.codes[last], self.cardinalities[last])
+            self.touched += len(prefix[0]) # only the rows left in the stripped partition
+        self.chain[len(keycolumns)] = (keycolumns, partition)
+        return partition
+    
+    def CountDistinct(self, keycolumns):
+        """ Counts the distinct value combinations of <keycolumns> """
+        if len(keycolumns) == 1:
+            return self.cardinalities[keycolumns[0]]
+        rowindexes, _, groups = self.Partition(keycolumns)
+        # Every stripped row is unique, every group counts once
+        return self.rows - len(rowindexes) + groups
+    
+    def MaximumDistinct(self, keycolumns):
+        """
+        Returns the maximum amount of distinct value combinations that
+        <keycolumns> can have, judging by the row sample. Every sampled
+        row that duplicates another sampled row is a duplicate in the
+        whole table as well, so it lowers the maximum by one.
+        """
+        if not self.samplesize or len(keycolumns) == 1:
+            return self.rows
+        samplerows = len(self.samplecodes[keycolumns[0]])
+        self.touched += samplerows
+        duplicates = samplerows - CountDistinct(self.samplecodes, self.cardinalities, keycolumns)
+        return self.rows - duplicates
+    
+    def Hashes(self, keycolumns, start, stop):
+        """ Returns the mixed codes of <keycolumns> for the rows <start> to <stop> as uint64 """
+        hashes = self.codes[keycolumns[0]][start:stop].astype(np.uint64)
+        self.touched += len(hashes)
+        for c in keycolumns[1:]:
+            hashes = MixHashes(hashes, self.codes[c][start:stop].astype(np.uint64))
+        return hashes
+
+
+def SampleRejects(evaluator, keycolumns, minimum):
+    """
+    Returns True if the row sample of <evaluator> proves that <keycolumns>
+    has fewer than <minimum> distinct values. The sample needs more than
+    rows - <minimum> duplicates for that, so near the default --precision
+    of 99.9% it rarely rejects anything and only costs time. It is
+    therefore switched off when it can not hold enough duplicates or when
+    it rejects fewer than one in eight of the first SAMPLETRIAL
+    combinations.
+    """
+    if not evaluator.samplesize or len(keycolumns) == 1:
+        return False
+    if evaluator.rows - minimum >= evaluator.samplesize - 1:
+        evaluator.samplesize = 0
+        return False
+    rejected = evaluator.MaximumDistinct(keycolumns) < minimum
+    evaluator.sampled += 1
+    evaluator.rejected += rejected
+    if evaluator.sampled == SAMPLETRIAL and evaluator.rejected * 8 < SAMPLETRIAL:
+        evaluator.samplesize = 0
+    return rejected
+
+
+def SketchSpares(evaluator):
+    """
+    Returns True while the sketch of <evaluator> spares enough exact
+    counts. A combination whose estimate is close to a primary key is
+    counted exactly after all, so there the sketch only costs time. It is
+    therefore switched off when more than half of the first SKETCHTRIAL
+    sketched combinations had to be counted exactly anyway.
+    """
+    return evaluator.sketched < SKETCHTRIAL or evaluator.recounted * 2 <= evaluator.sketched
+
+
+def EvaluateCombination(evaluator, keycolumns, rows, minimum, approximate=False):
+    """
+    Counts the distinct values of <keycolumns> with <evaluator> and
+    returns the status and the value for ScanCombinations(). With
+    <approximate> only combinations whose sketch estimate is close to
+    <rows> are counted exactly (a primary key must be exact), the rest
+    is returned as "estimated". Tables of up to SKETCHROWS rows are
+    always counted exactly: there the sketch falls back to linear
+    counting, whose collisions make a primary key look like duplicates.
+    """
+    if SampleRejects(evaluator, keycolumns, minimum):
+        return ("rejected", None)
+    if approximate and len(keycolumns) > 1 and rows > SKETCHROWS and SketchSpares(evaluator):
+        sketch = EstimateDistinct(evaluator, keycolumns, rows)
+        estimate = sketch.Estimate()
+        evaluator.sketched += 1
+        # Four standard errors: a primary key is missed in less than 0.01% of the cases
+        if estimate < rows * (1 - SKETCHERRORS * sketch.error):
+            return ("estimated", min(estimate, rows - 1))
+        evaluator.recounted += 1
+    return ("tested", evaluator.CountDistinct(keycolumns))
+
+
+def ScanCombinations(evaluator, cardinalities, rows, columnlist, maxcolumns, minimum, approximate=False, start=0, keys=()):
+    """
+    Tests all combinations of up to <maxcolumns> columns of <columnlist>
+    in the order of ColumnCombinations(). <evaluator> counts the distinct
+    values of a combination (PartitionLattice or HashedColumns). Yields a tuple for every
+    combination: (keycolumns, "skipped", found key that is a subset),
+    (keycolumns, "pruned", None), (keycolumns, "rejected", None) when
+    the row sample already has too many duplicates, (keycolumns,
+    "estimated", estimated distinct) with <approximate> or (keycolumns,
+    "tested", distinct). To resume a scan, the first <start> combinations
+    are left out and the primary <keys> found in them are given.
+    """
+    foundkeys = set(keys)
+    for keycolumns in itertools.islice(ColumnCombinations(columnlist, maxcolumns), start, None):
+        _key = FindKeySubset(keycolumns, foundkeys)
+        if _key is not None:
+            yield (keycolumns, "skipped", _key)
+            continue
+        if not ViableCombination(keycolumns, cardinalities, minimum):
+            yield (keycolumns, "pruned", None)
+            continue
+        status, distinct = EvaluateCombination(evaluator, keycolumns, rows, minimum, approximate)
+        if status == "tested" and distinct == rows:
+            foundkeys.add(keycolumns)
+        yield (keycolumns, status, distinct)
+
+
+_WORKER = {} # state of a worker process of ScanCombinationsParallel()
+
+
+def _InitWorker(shmname, shape, columnlist, cardinalities, rows, samplesize, minimum, approximate):
+    """ Attaches a worker process to the shared memory holding the column codes """
+    shm = shared_memory.SharedMemory(name=shmname)
+    matrix = np.ndarray(shape, dtype=np.int64, buffer=shm.buf)
+    codes = [None] * len(cardinalities)
+    for i, c in enumerate(columnlist):
+        codes[c] = matrix[i]
+    _WORKER["shm"] = shm # keep the block attached as long as the worker lives
+    _WORKER["lattice"] = PartitionLattice(codes, cardinalities, rows, samplesize)
+    _WORKER["minimum"] = minimum
+    _WORKER["approximate"] = approximate
+
+
+def _EvaluatePrefix(task):
+    """
+    Evaluates <prefix> extended by every column in <lasts> and returns
+    the (status, value) of every combination (see EvaluateCombination()).
+    """
+    prefix, lasts = task
+    lattice = _WORKER["lattice"]
+    return [EvaluateCombination(lattice, prefix + (last,), lattice.rows, _WORKER["minimum"], _WORKER["approximate"]) for last in lasts]
+
+
+def ScanCombinationsParallel(codes, cardinalities, rows, columnlist, maxcolumns, minimum, jobs, samplesize=0, approximate=False, start=0, keys=(), batchsize=1 << 16):
+    """
+    Same as ScanCombinations() but spreads the combinations over a pool
+    of <jobs> processes. The column codes are put into shared memory once,
+    so they are not pickled for every worker. The lattice is processed
+    level by level (all combinations of one width at a time), so every
+    primary key that could be a subset of a combination is already known
+    before the combination is dispatched. Every level is dispatched in
+    batches of <batchsize> combinations. Results are yielded in the order
+    of ColumnCombinations().
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(len(columnlist) * rows * 8, 1))
+    try:
+        matrix = np.ndarray((len(columnlist), rows), dtype=np.int64, buffer=shm.buf)
+        for i, c in enumerate(columnlist):
+            matrix[i] = codes[c]
+        del matrix
+        foundkeys = set(keys)
+        initargs = (shm.name, (len(columnlist), rows), columnlist, cardinalities, rows, samplesize, minimum, approximate)
+        with multiprocessing.Pool(jobs, initializer=_InitWorker, initargs=initargs) as pool:
+            for width in range(1, maxcolumns+1):
+                # Leave out the combinations of a resumed scan
+                combinations = PredictCombinations(columnlist, width)[0] - PredictCombinations(columnlist, width-1)[0]
+                if start >= combinations:
+                    start -= combinations
+                    continue
+                # Decide what can be skipped and group the rest by prefix.
+                # Combinations with the same prefix follow each other, so
+                # every group is one task that refines the prefix once. The
+                # level is handled in batches, so it is never held in memory
+                combinations = itertools.islice(itertools.combinations(columnlist, width), start, None)
+                for batch in iter(lambda: list(itertools.islice(combinations, batchsize)), []):
+                    level = []
+                    tasks = []
+                    for keycolumns in batch:
+                        _key = FindKeySubset(keycolumns, foundkeys)
+                        if _key is not None:
+                            level.append((keycolumns, "skipped", _key))
+                        elif not ViableCombination(keycolumns, cardinalities, minimum):
+                            level.append((keycolumns, "pruned", None))
+                        elif width == 1:
+                            level.append((keycolumns, "tested", cardinalities[keycolumns[0]]))
+                        else:
+                            level.append((keycolumns, "queued", None))
+                            if tasks and tasks[-1][0] == keycolumns[:-1]:
+                                tasks[-1][1].append(keycolumns[-1])
+                            else:
+                                tasks.append((keycolumns[:-1], [keycolumns[-1]]))
+                    
+                    results = pool.imap(_EvaluatePrefix, tasks)
+                    pending = []
+                    for keycolumns, status, value in level:
+                        if status == "queued":
+                            if not pending:
+                                pending = next(results)[::-1]
+                            status, value = pending.pop()
+                        if status == "tested" and value == rows:
+                            foundkeys.add(keycolumns)
+                        yield (keycolumns, status, value)
+                start = 0
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+class BestFirstScan:
+    """
+    Anytime alternative to ScanCombinations() for wide tables: tests the
+    most promising combinations first and stops after <budget> seconds.
+    The columns are ordered by their amount of distinct values and every
+    combination is scored by an estimate of its distinct values: the
+    distinct values of the combination it extends (or the product of the
+    cardinalities, if that one was not counted) times the distinct values
+    of the added column. A priority queue holds the best unexplored
+    extension of every combination, so it grows by at most two entries
+    per tested combination.
+    
+    A primary key found this way can contain columns that are not needed,
+    so it is reduced to a minimal key by dropping one column after the
+    other while the rest stays unique. Yields the same tuples as
+    ScanCombinations(), supersets of a reduced key come as "skipped".
+    Subsets that turn out to be no key are yielded when the queue reaches
+    them, so besides the queue only the reduced keys and their supersets
+    are remembered, until the queue reaches them as well. After the
+    iteration, <exhaustive> tells whether every combination was reached
+    before the time ran out.
+    """
+    def __init__(self, evaluator, cardinalities, rows, columnlist, maxcolumns, minimum, budget, approximate=False):
+        self.evaluator = evaluator
+        self.cardinalities = cardinalities
+        self.rows = rows
+        self.order = sorted(columnlist, key=lambda c: (-cardinalities[c], c))
+        self.maxcolumns = maxcolumns
+        self.minimum = minimum
+        self.budget = budget
+        self.approximate = approximate
+        self.exhaustive = None
+    
+    def __iter__(self):
+        deadline = time.time() + self.budget
+        foundkeys = set()
+        ahead = {} # keycolumns -> (status, value) of combinations yielded before the queue reached them
+        queue = [] # (-estimated distinct, width, counter, positions in <order>, distinct values the estimate is based on)
+        counter = itertools.count()
+        
+        def push(positions, base):
+            estimate = min(base * self.cardinalities[self.order[positions[-1]]], self.rows)
+            heapq.heappush(queue, (-estimate, len(positions), next(counter), positions, base))
+        
+        def evaluate(keycolumns):
+            if not ViableCombination(keycolumns, self.cardinalities, self.minimum):
+                return ("pruned", None)
+            return EvaluateCombination(self.evaluator, keycolumns, self.rows, self.minimum, self.approximate)
+        
+        if self.order and self.maxcolumns > 0:
+            push((0,), 1)
+        while queue:
+            if time.time() >= deadline:
+                self.exhaustive = False
+                return
+            estimate, width, _, positions, base = heapq.heappop(queue)
+            if positions[-1] + 1 < len(self.order):
+                push(positions[:-1] + (positions[-1] + 1,), base) # the next sibling
+            keycolumns = tuple(sorted(self.order[p] for p in positions))
+            
+            if keycolumns in ahead:
+                status, value = ahead.pop(keycolumns)
+            else:
+                _key = FindKeySubset(keycolumns, foundkeys)
+                status, value = ("skipped", _key) if _key is not None else evaluate(keycolumns)
+                if status == "tested" and value == self.rows:
+                    # Drop every column that is not needed for the uniqueness. If dropping
+                    # a column fails, it also fails for every smaller subset, so one pass
+                    # over the columns leads to a minimal key
+                    current = keycolumns
+                    supersets = []
+                    for c in keycolumns:
+                        candidate = tuple(x for x in current if x != c)
+                        if not candidate:
+                            continue
+                        substatus, subvalue = evaluate(candidate)
+                        if substatus == "tested" and subvalue == self.rows:
+                            supersets.append(current)
+                            current = candidate
+                    foundkeys.add(current)
+                    yield (current, "tested", self.rows)
+                    for superset in supersets:
+                        yield (superset, "skipped", current)
+                    # The queue has just reached <keycolumns>, the others come later
+                    for superset in supersets[1:]:
+                        ahead[superset] = ("skipped", current)
+                    if current != keycolumns:
+                        ahead[current] = ("tested", self.rows)
+                else:
+                    yield (keycolumns, status, value)
+            
+            # A key or a superset of a key is never extended, it stays a superset
+            if status == "skipped" or (status == "tested" and value == self.rows):
+                continue
+            if width < self.maxcolumns and positions[-1] + 1 < len(self.order):
+                base = value if status in ("tested", "estimated") else -estimate
+                push(positions + (positions[-1] + 1,), base)
+        self.exhaustive = True
+
+
+class PartitionCache:
+    """
+    Stripped partitions of any column combinations, for searches that
+    jump through the lattice (see UniqueDiscovery) instead of following
+    the order of ColumnCombinations() like PartitionLattice. Combinations
+    are bitmasks of their columns. A partition is refined from the cached
+    partition of a subset without one column that has the fewest rows
+    left, the least recently used partitions are dropped beyond <memory>
+    bytes.
+    """
+    def __init__(self, codes, cardinalities, memory=1 << 28):
+        self.codes = codes
+        self.cardinalities = cardinalities
+        self.memory = memory
+        self.cache = collections.OrderedDict() # mask -> partition
+        self.size = 0
+    
+    def Store(self, mask, partition):
+        size = partition[0].nbytes + partition[1].nbytes
+        if size > self.memory:
+            return
+        self.cache[mask] = partition
+        self.size += size
+        while self.size > self.memory:
+            _, dropped = self.cache.popitem(last=False)
+            self.size -= dropped[0].nbytes + dropped[1].nbytes
+    
+    def Partition(self, mask, keycolumns):
+        """ Returns the stripped partition of <keycolumns>, whose bitmask is <mask> """
+        partition = self.cache.get(mask)
+        if partition is not None:
+            self.cache.move_to_end(mask)
+            return partition
+        # Walks move by one column, so the subsets without one column are
+        # usually cached already
+        base = None
+        for c in keycolumns:
+            candidate = self.cache.get(mask & ~(1 << c))
+            if candidate is not None and (base is None or len(candidate[0]) < len(partition[0])):
+                base, partition = mask & ~(1 << c), candidate
+        # Columns with many distinct values shrink the partition the most
+        rest = sorted([c for c in keycolumns if base is None or not base >> c & 1], key=lambda c: -self.cardinalities[c])
+        if base is None:
+            partition = StrippedPartition(self.codes[rest[0]], self.cardinalities[rest[0]])
+            self.Store(1 << rest[0], partition)
+            rest = rest[1:]
+        for c in rest:
+            if len(partition[0]) == 0:
+                break # unique already, more columns change nothing
+            partition = RefinePartition(partition, self.codes[c], self.cardinalities[c])
+        self.Store(mask, partition)
+        return partition
+
+
+def MinimalHittingSets(family, hitting=(0,)):
+    """
+    Returns the minimal sets (bitmasks) that share at least one column
+    with every bitmask in <family>, built up one set of the family after
+    the other (Berge's algorithm). More sets can be added later by giving
+    the result of the earlier ones as <hitting>.
+    """
+    hitting = list(hitting)
+    for members in family:
+        keep = [h for h in hitting if h & members]
+        # An extended set h | bit is only not minimal if a kept set with
+        # that bit is a subset of it, so the kept sets are indexed by bit
+        bybit = collections.defaultdict(list)
+        for h in keep:
+            bits = h & members
+            while bits:
+                low = bits & -bits
+                bybit[low].append(h)
+                bits ^= low
+        extended = set()
+        for h in hitting:
+            if h & members:
+                continue
+            bits = members
+            while bits:
+                low = bits & -bits
+                bits ^= low
+                candidate = h | low
+                if not any(k & candidate == k for k in bybit[low]):
+                    extended.add(candidate)
+        hitting = keep + list(extended)
+    return hitting
+
+
+class UniqueDiscovery:
+    """
+    Finds all minimal primary keys (minimal unique column combinations)
+    of any width among <columnlist>, in the style of DUCC: random walks
+    through the lattice of column combinations move from a non-unique
+    combination to a non-unique superset until every superset is unique
+    (a maximal non-unique) and from a unique combination to a unique
+    subset until every subset is non-unique (a minimal unique). Every
+    evaluated combination prunes the lattice: the supersets of a unique
+    and the subsets of a non-unique are known without counting, and
+    walks only step onto combinations that are not known yet.
+    
+    When the walks end, the minimal uniques have to be exactly the minimal
+    hitting sets of the complements of the maximal non-uniques. Every
+    hitting set that is not a known minimal unique is a hole in what the
+    walks saw and becomes the start of another walk, until there are no
+    holes left. <codes> are the encoded columns or None for a HashedColumns,
+    whose distinct values are counted by the <evaluator> instead.
+    """
+    def __init__(self, evaluator, codes, cardinalities, rows, columnlist, memory=1 << 28, seed=0):
+        self.evaluator = evaluator
+        self.rows = rows
+        self.columnlist = list(columnlist)
+        self.full = sum(1 << c for c in self.columnlist)
+        self.partitions = None if codes is None else PartitionCache(codes, cardinalities, memory)
+        self.random = random.Random(seed)
+        self.uniques = collections.defaultdict(set) # lowest bit -> known unique combinations, only the minimal ones are kept
+        self.nonuniques = [] # known non-unique combinations, only the maximal ones are kept
+        self.minimal = set()
+        self.maximal = set()
+        self.evaluations = 0
+    
+    def Columns(self, mask):
+        return tuple(c for c in self.columnlist if mask >> c & 1)
+    
+    def Known(self, mask):
+        """ Returns True or False if the uniqueness of <mask> follows from earlier ones, else None """
+        bits = mask
+        while bits:
+            low = bits & -bits
+            if any(u & mask == u for u in self.uniques[low]):
+                return True
+            bits ^= low
+        if any(n & mask == mask for n in self.nonuniques):
+            return False
+        return None
+    
+    def Witness(self, mask, unique):
+        """
+        Returns the known combination that the uniqueness of <mask> follows
+        from. None of its neighbours of the same kind is known yet, so a
+        walk from there does not get stuck.
+        """
+        if unique:
+            bits = mask
+            while bits:
+                low = bits & -bits
+                for u in self.uniques[low]:
+                    if u & mask == u:
+                        return u
+                bits ^= low
+        else:
+            for n in self.nonuniques:
+                if n & mask == mask:
+                    return n
+        return mask
+    
+    def IsUnique(self, mask):
+        known = self.Known(mask)
+        if known is not None:
+            return known
+        keycolumns = self.Columns(mask)
+        self.evaluations += 1
+        if SampleRejects(self.evaluator, keycolumns, self.rows):
+            unique = False # the row sample has duplicates already
+        elif self.partitions is not None:
+            unique = len(self.partitions.Partition(mask, keycolumns)[0]) == 0
+        else:
+            unique = self.evaluator.CountDistinct(keycolumns) == self.rows
+        if unique:
+            for low, uniques in self.uniques.items():
+                if low <= mask & -mask: # a superset has the lowest bit of <mask> or a lower one
+                    uniques -= {u for u in uniques if u & mask == mask}
+            self.uniques[mask & -mask].add(mask)
+        else:
+            self.nonuniques = [n for n in self.nonuniques if n & mask != n] + [mask]
+        return unique
+    
+    def Neighbours(self, mask, unique):
+        """ The subsets of a unique and the supersets of a non-unique <mask> that differ by one column """
+        if unique:
+            return [mask & ~(1 << c) for c in self.columnlist if mask >> c & 1 and mask & ~(1 << c)]
+        return [mask | (1 << c) for c in self.columnlist if not mask >> c & 1]
+    
+    def Walk(self, start):
+        """ Walks from <start> and yields the bitmask of every new minimal unique """
+        unique = self.IsUnique(start)
+        start = self.Witness(start, unique)
+        trail = [(start, unique, None)]
+        while trail:
+            mask, unique, steps = trail.pop()
+            if steps is None:
+                steps = self.Neighbours(mask, unique)
+                self.random.shuffle(steps)
+            # Step onto the next neighbour of the same kind that is not known yet
+            while steps:
+                step = steps.pop()
+                if self.Known(step) is None and self.IsUnique(step) == unique:
+                    trail.append((mask, unique, steps))
+                    trail.append((step, unique, None))
+                    break
+            else:
+                if unique and mask not in self.minimal and not any(self.IsUnique(n) for n in self.Neighbours(mask, True)):
+                    self.minimal.add(mask)
+                    yield mask
+                elif not unique and mask not in self.maximal and all(self.IsUnique(n) for n in self.Neighbours(mask, False)):
+                    self.maximal.add(mask)
+    
+    def __iter__(self):
+        """ Yields the columns of every minimal primary key as soon as it is found """
+        starts = [1 << c for c in self.columnlist]
+        self.random.shuffle(starts)
+        # The empty combination is the first non-unique in a table with more than one row
+        hitting = MinimalHittingSets([self.full]) if self.rows > 1 else []
+        covered = set()
+        while starts:
+            for start in starts:
+                for mask in self.Walk(start):
+                    yield self.Columns(mask)
+            complements = [self.full & ~n for n in self.maximal - covered]
+            covered |= self.maximal
+            hitting = MinimalHittingSets(complements, hitting)
+            starts = [h for h in hitting if h not in self.minimal]
+
+
+def ScrambleHashes(hashes):
+    """
+    Scrambles the bits of the uint64 array <hashes> with the splitmix64
+    finalizer, so even small consecutive integers become random looking.
+    """
+    hashes = hashes ^ (hashes >> np.uint64(30))
+    hashes = hashes * np.uint64(0xBF58476D1CE4E5B9)
+    hashes = hashes ^ (hashes >> np.uint64(27))
+    hashes = hashes * np.uint64(0x94D049BB133111EB)
+    return hashes ^ (hashes >> np.uint64(31))
+
+
+def MixHashes(hashes, values):
+    """
+    Mixes the 64 bit <values> of one more column into the running row
+    <hashes> (both uint64 arrays, overflow wraps around). The running
+    hashes are scrambled first, so the order of the columns matters:
+    (5, 7) and (7, 5) give different hashes.
+    """
+    return ScrambleHashes(hashes) ^ values
+
+
+class HyperLogLog:
+    """
+    Cardinality sketch with 2^<bits> registers. It estimates the amount of
+    distinct hashes it has seen with a standard error of 1.04/sqrt(2^bits)
+    (0.41% for the default of 16 bits) in a fixed 2^bits bytes of memory.
+    Two sketches can be merged, so chunks can be sketched separately.
+    """
+    def __init__(self, bits=16):
+        self.bits = bits
+        self.registers = np.zeros(1 << bits, dtype=np.uint8)
+    
+    @property
+    def error(self):
+        """ Relative standard error of the estimate """
+        return 1.04 / np.sqrt(len(self.registers))
+    
+    def Update(self, hashes):
+        """ Adds the uint64 array <hashes> (should be scrambled) to the sketch """
+        if len(hashes) == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.bits)).astype(np.intp)
+        rest = hashes << np.uint64(self.bits)
+        # Position of the first 1-bit in the remaining bits (1 = highest bit),
+        # frexp() returns the bit length (0 for no 1-bit at all)
+        rank = (65 - np.frexp(rest.astype(np.float64))[1]).astype(np.uint8)
+        np.minimum(rank, 64 - self.bits + 1, out=rank)
+        np.maximum.at(self.registers, index, rank)
+    
+    def Merge(self, other):
+        """ Merges the sketch <other> into this one """
+        np.maximum(self.registers, other.registers, out=self.registers)
+    
+    def Estimate(self):
+        """ Returns the estimated amount of distinct hashes """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros) # linear counting for small cardinalities
+        return int(round(estimate))
+
+
+def EstimateDistinct(evaluator, keycolumns, rows, chunkrows=1 << 14):
+    """
+    Estimates the distinct value combinations of <keycolumns> with a
+    HyperLogLog sketch. The rows are sketched in chunks of <chunkrows>,
+    so the memory needed does not grow with the table. Small chunks stay
+    in the CPU cache, which makes mixing the hashes about twice as fast.
+    """
+    sketch = HyperLogLog()
+    for start in range(0, rows, chunkrows):
+        sketch.Update(ScrambleHashes(evaluator.Hashes(keycolumns, start, start + chunkrows)))
+    return sketch
+
+
+class HashedColumns:
+    """
+    Out-of-core storage for CSV files that do not fit into memory. The
+    file is read in chunks and every selected column is stored as one
+    64 bit hash per row in a spill file. Distinct values of a column
+    combination are counted by mixing the hashes of its columns and
+    hash-partitioning them into temporary files, so at most <memory>
+    bytes of row data are held at once. Two different combinations can
+    only be mistaken for duplicates if their 64 bit hashes collide.
+    """
+    def __init__(self, filepath, usecolumns, memory, samplesize=0):
+        self.memory = memory
+        self.samplesize = samplesize
+        self.sampled = 0 # combinations counted on the sample, see SampleRejects()
+        self.rejected = 0
+        self.sketched = 0 # combinations estimated with a sketch, see SketchSpares()
+        self.recounted = 0
+        self.touched = 0 # rows read from the spill files (see ScanProfile)
+        self.directory = tempfile.TemporaryDirectory(prefix="primarykey-")
+        self.names = None
+        self.rows = 0
+        self.files = {}
+        self.cardinalities = None
+        
+        # Estimate the size of a row from a small sample to size the chunks
+        options = CsvOptions(filepath)
+        sample = pd.read_csv(filepath, engine="c", dtype=str, nrows=1000, **options)
+        self.names = list(sample.columns)
+        if usecolumns is None:
+            usecolumns = list(range(len(self.names)))
+        rowbytes = max(sample.memory_usage(deep=True, index=False).sum() / max(len(sample), 1), 1)
+        self.chunkrows = max(int(memory / 4 / (rowbytes + 8 * len(usecolumns))), 1000)
+        
+        spills = {c: open(self.SpillPath(c), "wb") for c in usecolumns}
+        try:
+            # dtype=str keeps the raw text, so every chunk hashes values the same way
+            for chunk in pd.read_csv(filepath, engine="c", dtype=str, chunksize=self.chunkrows, **options):
+                for c in usecolumns:
+                    hashes = pd.util.hash_pandas_object(chunk.iloc[:, c], index=False).to_numpy()
+                    hashes.tofile(spills[c])
+                self.rows += len(chunk)
+        finally:
+            for f in spills.values():
+                f.close()
+        for c in usecolumns:
+            self.files[c] = np.memmap(self.SpillPath(c), dtype=np.uint64, mode="r", shape=(self.rows,)) if self.rows else np.zeros(0, dtype=np.uint64)
+        
+        self.cardinalities = [None] * len(self.names)
+        for c in usecolumns:
+            self.cardinalities[c] = self.CountDistinct((c,))
+    
+    def SpillPath(self, name):
+        return os.path.join(self.directory.name, "{}.bin".format(name))
+    
+    def Close(self):
+        """ Removes all spill files """
+        self.files = {}
+        self.directory.cleanup()
+    
+    def Hashes(self, keycolumns, start, stop):
+        """ Returns the mixed hashes of <keycolumns> for the rows <start> to <stop> """
+        hashes = np.array(self.files[keycolumns[0]][start:stop])
+        self.touched += len(hashes)
+        for c in keycolumns[1:]:
+            hashes = MixHashes(hashes, self.files[c][start:stop])
+        return hashes
+    
+    def Partitions(self):
+        """ Returns the amount of partition files CountDistinct() spills the hashes into """
+        # A hash table needs roughly three times the size of its keys
+        return int(self.rows * 8 * 3 // self.memory) + 1
+    
+    def CountDistinct(self, keycolumns):
+        """ Counts the distinct value combinations of <keycolumns> """
+        if len(keycolumns) == 1 and self.cardinalities is not None and self.cardinalities[keycolumns[0]] is not None:
+            return self.cardinalities[keycolumns[0]]
+        
+        partitions = self.Partitions()
+        step = max(int(self.memory // (8 * 4 * len(keycolumns))), 1)
+        if partitions == 1:
+            return len(pd.unique(self.Hashes(keycolumns, 0, self.rows)))
+        
+        # Equal hashes always land in the same partition, so the
+        # distinct counts of the partitions simply add up.
+        paths = [self.SpillPath("part{}".format(p)) for p in range(partitions)]
+        spills = [open(path, "wb") for path in paths]
+        try:
+            for start in range(0, self.rows, step):
+                hashes = self.Hashes(keycolumns, start, start + step)
+                part = hashes % np.uint64(partitions)
+                order = np.argsort(part, kind="stable")
+                bounds = np.searchsorted(part[order], np.arange(partitions + 1))
+                hashes = hashes[order]
+                for p in range(partitions):
+                    hashes[bounds[p]:bounds[p+1]].tofile(spills[p])
+        finally:
+            for f in spills:
+                f.close()
+        distinct = 0
+        for path in paths:
+            distinct += len(pd.unique(np.fromfile(path, dtype=np.uint64)))
+            os.remove(path)
+        return distinct
+    
+    def MaximumDistinct(self, keycolumns):
+        """
+        Returns the maximum amount of distinct value combinations that
+        <keycolumns> can have, judging by the first <samplesize> rows
+        (see PartitionLattice.MaximumDistinct()).
+        """
+        if not 0 < self.samplesize < self.rows or len(keycolumns) == 1:
+            return self.rows
+        samplerows = self.samplesize
+        duplicates = samplerows - len(pd.unique(self.Hashes(keycolumns, 0, samplerows)))
+        return self.rows - duplicates
+
+
+def EquivalentColumns(table, columnlist):
+    """
+    Finds the columns of <columnlist> that can never change whether a
+    combination is a key: constant columns (one distinct value in more
+    than one row) and columns whose rows are grouped exactly like those
+    of an earlier column, e.g. an ID and its copy or a code and its
+    description. Factorized codes are numbered in the order of the first
+    occurrence, so two columns group their rows the same way exactly if
+    their codes are equal. Returns the constant columns and a dictionary
+    {first column: [equivalent columns]}. Only constant columns are found
+    for a HashedColumns.
+    """
+    constants = [c for c in columnlist if table.rows > 1 and table.cardinalities[c] == 1]
+    equivalents = {}
+    if isinstance(table, HashedColumns):
+        return constants, equivalents
+    
+    buckets = collections.defaultdict(list) # (cardinality, digest of the codes) -> first columns
+    for c in columnlist:
+        if c in constants:
+            continue
+        codes = np.ascontiguousarray(table.codes[c])
+        bucket = buckets[(table.cardinalities[c], hashlib.blake2b(codes.view(np.uint8)).digest())]
+        for first in bucket:
+            if np.array_equal(table.codes[first], codes):
+                equivalents[first].append(c)
+                break
+        else:
+            bucket.append(c)
+            equivalents[c] = []
+    return constants, {c: others for c, others in equivalents.items() if others}
+
+
+KeyResult = collections.namedtuple("KeyResult", ["columns", "names", "distinct", "rows", "precision", "key", "exact"])
+KeyResult.__doc__ = """
+A primary key (<key> is True) or pseudo-primary-key found by KeySearch.
+<columns> are the column indexes (starting at 0), <names> the column
+names, <distinct> the amount of distinct value combinations in <rows>
+rows and <precision> the ratio of both. <exact> is False if <distinct>
+is just a sketch estimate (approximate mode).
+"""
+
+
+class KeySearch:
+    """
+    Searches the primary keys and pseudo-primary-keys of an EncodedTable
+    (or the spilled hashes of a HashedColumns) among all combinations of
+    up to <maxcolumns> columns of <columnlist>. Pseudo-primary-keys are
+    combinations in which at least <precision> (0 to 1) of the items are
+    unique; None only searches primary keys. Constant columns and columns
+    equivalent to an earlier one are not searched, see Alternatives().
+    See find_keys().
+    """
+    def __init__(self, table, columnlist, maxcolumns, precision=None, jobs=1, samplesize=10000, approximate=False):
+        self.table = table
+        self.names = table.names
+        self.rows = table.rows
+        self.cardinalities = table.cardinalities
+        self.columnlist = list(columnlist)
+        # Only the first of equivalent columns is searched (see EquivalentColumns())
+        self.constants, self.equivalents = EquivalentColumns(table, self.columnlist)
+        skip = set(self.constants).union(*self.equivalents.values())
+        self.searchlist = [c for c in self.columnlist if c not in skip]
+        self.maxcolumns = min(maxcolumns, len(self.searchlist))
+        self.precision = precision
+        self.minimum = MinimumDistinct(self.rows, 1.0 if precision is None else precision)
+        self.jobs = jobs
+        self.samplesize = samplesize
+        # A sketch can not prove a primary key, and it is only faster than
+        # the exact count where that spills into partition files
+        self.approximate = approximate and precision is not None and isinstance(table, HashedColumns) and table.Partitions() > 1
+        self.exhaustive = None # whether the last search tested every combination
+        self.evaluations = 0 # combinations counted by the last Discover()
+        if isinstance(table, HashedColumns):
+            self.evaluator = table
+            self.jobs = 1 # the spill files can not be shared with worker processes
+        else:
+            self.evaluator = PartitionLattice(table.codes, table.cardinalities, table.rows, samplesize)
+    
+    def Predict(self):
+        """ Returns the amount of combinations and how many of them survive the pruning """
+        return PredictCombinations(self.searchlist, self.maxcolumns, self.cardinalities, self.minimum)
+    
+    def Calibrate(self):
+        """ Returns a ScanClock that predicts the duration of the search """
+        return ScanClock(CalibrateScan(self.evaluator, self.cardinalities, self.rows, self.searchlist, self.maxcolumns, self.minimum, self.approximate), self.jobs)
+    
+    def Result(self, keycolumns, distinct, exact=True):
+        """ Creates the KeyResult of <keycolumns> """
+        return KeyResult(tuple(keycolumns), tuple(self.names[c] for c in keycolumns), distinct, self.rows,
+                         distinct / self.rows if self.rows else 1.0, distinct == self.rows, exact)
+    
+    def Alternatives(self, result):
+        """
+        Returns the KeyResults of all combinations that replace columns of
+        <result> by equivalent columns (see EquivalentColumns()).
+        """
+        choices = [[c] + self.equivalents.get(c, []) for c in result.columns]
+        alternatives = []
+        for keycolumns in itertools.product(*choices):
+            keycolumns = tuple(sorted(keycolumns))
+            if keycolumns != result.columns:
+                alternatives.append(result._replace(columns=keycolumns, names=tuple(self.names[c] for c in keycolumns)))
+        return alternatives
+    
+    def Duplicates(self, result, limit):
+        """
+        Returns up to <limit> groups of rows that share the values of the
+        columns of <result>, as (row indexes, values) ordered by their first
+        row. The groups come from the stripped partition of the uniqueness
+        check, the rows are not read again. None for a HashedColumns, which
+        only keeps hashes of the values.
+        """
+        if isinstance(self.table, HashedColumns):
+            return None
+        rowindexes, groups, _ = self.evaluator.Partition(result.columns)
+        # Rows of the same group next to each other, ascending in every group
+        order = np.argsort(groups, kind="stable")
+        rowindexes, groups = rowindexes[order], groups[order]
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        stops = np.r_[starts[1:], len(groups)]
+        first = np.argsort(rowindexes[starts], kind="stable")[:limit]
+        duplicates = []
+        for g in first:
+            rows = rowindexes[starts[g]:stops[g]]
+            values = tuple(self.table.uniques[c][self.table.codes[c][rows[0]]] for c in result.columns)
+            duplicates.append((rows, values))
+        return duplicates
+    
+    def Verify(self, result):
+        """ Returns <result> with the exact amount of distinct values """
+        if result.exact:
+            return result
+        return self.Result(result.columns, self.evaluator.CountDistinct(result.columns))
+    
+    def Results(self, callback=None, start=0, keys=(), budget=None):
+        """
+        Tests the combinations in the order of ColumnCombinations() and
+        yields a KeyResult for every primary key and pseudo-primary-key as
+        soon as it is found. <callback> is called with (keycolumns, status,
+        value) for every combination (see ScanCombinations()). A stopped
+        search is resumed by leaving out the first <start> combinations
+        and giving the columns of the primary <keys> found in them. With a
+        <budget> in seconds the most promising combinations are tested
+        first instead (see BestFirstScan()) and <exhaustive> tells
+        afterwards whether all of them could be tested.
+        """
+        keys = [tuple(k) for k in keys]
+        if budget is not None:
+            scan = BestFirstScan(self.evaluator, self.cardinalities, self.rows, self.searchlist, self.maxcolumns, self.minimum, budget, self.approximate)
+        elif self.jobs > 1:
+            scan = ScanCombinationsParallel(self.table.codes, self.cardinalities, self.rows, self.searchlist, self.maxcolumns, self.minimum, self.jobs, self.samplesize, self.approximate, start, keys)
+        else:
+            scan = ScanCombinations(self.evaluator, self.cardinalities, self.rows, self.searchlist, self.maxcolumns, self.minimum, self.approximate, start, keys)
+        tolerance = 1 - SKETCHERRORS * HyperLogLog().error
+        for keycolumns, status, value in scan:
+            if callback is not None:
+                callback(keycolumns, status, value)
+            if status == "tested" and value >= self.minimum:
+                yield self.Result(keycolumns, value)
+            elif status == "estimated" and self.precision is not None and value >= self.minimum * tolerance:
+                # Only a sketch estimate is known, it could be below the real value
+                yield self.Result(keycolumns, value, exact=False)
+        self.exhaustive = getattr(scan, "exhaustive", True)
+    
+    def Discover(self, memory=1 << 28):
+        """
+        Yields a KeyResult for every minimal primary key of any width among
+        the searched columns (see UniqueDiscovery), ignoring <maxcolumns>.
+        <evaluations> tells afterwards how many combinations were counted.
+        """
+        codes = None if isinstance(self.table, HashedColumns) else self.table.codes
+        discovery = UniqueDiscovery(self.evaluator, codes, self.cardinalities, self.rows, self.searchlist, memory)
+        for keycolumns in discovery:
+            self.evaluations = discovery.evaluations
+            yield self.Result(keycolumns, self.rows)
+        self.evaluations = discovery.evaluations
+
+
+class TopKeys:
+    """
+    Keeps the <size> pseudo-primary-keys with the highest precision in a
+    bounded min-heap, so the memory stays the same no matter how many
+    combinations reach --precision. Only the column indexes and counts
+    are stored; ties keep the combination that was found first.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.heap = [] # (distinct, -order, columns, exact), the worst entry first
+        self.order = 0
+    
+    def __len__(self):
+        return len(self.heap)
+    
+    def Add(self, result, order=None):
+        """
+        Offers a KeyResult, it is only kept while it belongs to the best
+        <size>. <order> decides ties, the lower wins (by default the order
+        of the calls).
+        """
+        if order is None:
+            order = self.order
+        entry = (result.distinct, -order, result.columns, result.exact)
+        self.order += 1
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, entry)
+        elif self.heap and entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+    
+    def Results(self, search):
+        """ Returns the kept entries as KeyResults of <search>, best first """
+        return [search.Result(columns, distinct, exact) for distinct, order, columns, exact in sorted(self.heap, reverse=True)]
+
+
+def find_keys(df, max_columns=3, precision=None, columns=None, jobs=1, sample_size=10000, approximate=False, time_budget=None):
+    """
+    Scans the DataFrame <df> for primary keys, ie. columns or combinations
+    of up to <max_columns> columns whose values identify every row. With
+    a <precision> (0 to 1) pseudo-primary-keys are reported as well, ie.
+    combinations in which at least that share of the items is unique.
+    <columns> limits the search to the given column labels. A
+    <time_budget> in seconds tests the most promising combinations first
+    and stops when the time is up (see BestFirstScan()). <approximate>
+    only applies to spilled hashes (see KeySearch), a DataFrame is always
+    counted exactly.
+    
+    Yields a KeyResult for every key as soon as it is found, so the search
+    can be stopped early, e.g. after the first primary key:
+        first = next(find_keys(df), None)
+    Keys that only differ by equivalent columns (see EquivalentColumns())
+    follow right after each other.
+    """
+    if columns is None:
+        columnlist = list(range(df.shape[1]))
+    else:
+        labels = list(df.columns)
+        columnlist = sorted(set(labels.index(c) for c in columns))
+    if max_columns < 1:
+        raise ValueError("max_columns must be at least 1")
+    search = KeySearch(EncodeColumns(df, columnlist), columnlist, max_columns, precision, jobs, sample_size, approximate)
+    
+    def results():
+        for result in search.Results(budget=time_budget):
+            if not result.exact:
+                # Only a sketch estimate is known, it may be below <precision>
+                result = search.Verify(result)
+                if result.distinct < search.minimum:
+                    continue
+            yield result
+            yield from search.Alternatives(result)
+    return results()
+
+
+def SortedHashes(hashes):
+    """ Returns the sorted distinct <hashes>, sorting them is many times faster than np.unique() """
+    hashes = np.sort(hashes)
+    return hashes[np.r_[True, hashes[1:] != hashes[:-1]]] if len(hashes) else hashes
+
+
+def SaveScanState(statefile, search, sheetname, results, indexes=None, shown=()):
+    """
+    Saves the primary keys and pseudo-primary-keys in <results> to
+    <statefile>, so a later scan of the same table with appended rows
+    only has to check the new rows (see RevalidateScan()). The keys and
+    the printed suggestions (the columns in <shown>) get a hash index
+    (the sorted distinct value hashes), the other suggestions only their
+    distinct count, so the file stays small. <indexes> are the hash
+    indexes that are known already.
+    """
+    results = [r for r in results if r.key] + [r for r in results if not r.key]
+    shown = set(shown)
+    arrays = {}
+    checksums = []
+    counts = []
+    keys = []
+    pseudokeys = []
+    for result in results:
+        hashes = search.table.Hashes(result.columns, 0, search.rows)
+        index = None
+        if result.key or result.columns in shown:
+            index = indexes[result.columns] if indexes is not None and result.columns in indexes else SortedHashes(hashes)
+            distinct = len(index)
+        else:
+            distinct = result.distinct if result.exact else search.Verify(result).distinct
+        if not result.key and distinct < search.minimum:
+            continue # an estimate was too high
+        if index is not None:
+            arrays["index{}".format(len(checksums))] = index
+        # Detects changes of the old rows. The sum wraps around at 2^64
+        checksums.append(int(np.sum(hashes, dtype=np.uint64)))
+        counts.append(int(distinct))
+        (keys if result.key else pseudokeys).append(list(result.columns))
+    meta = {"version": __version__, "sheet": str(sheetname), "names": [str(n) for n in search.names],
+            "columnlist": search.columnlist, "searchlist": search.searchlist, "maxcolumns": search.maxcolumns, "precision": search.precision,
+            "rows": search.rows, "keys": keys, "pseudokeys": pseudokeys, "checksums": checksums, "counts": counts, "exhaustive": True}
+    temporary = statefile + ".tmp"
+    with open(temporary, "wb") as f:
+        np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(temporary, statefile)
+
+
+def LoadScanState(statefile):
+    """ Returns the metadata and the hash indexes saved by SaveScanState() (None where there is none) or None """
+    try:
+        with np.load(statefile, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            indexes = [data["index{}".format(i)] if "index{}".format(i) in data.files else None for i in range(len(meta["checksums"]))]
+    except (OSError, ValueError, KeyError):
+        return None
+    return meta, indexes
+
+
+def RevalidateScan(search, state, sheetname):
+    """
+    Checks whether the primary keys saved in <state> (see LoadScanState())
+    still hold in the table of <search>, which may have new rows appended,
+    and updates the precision of the saved pseudo-primary-keys. Only the
+    new hashes are merged into the sorted hash indexes, suggestions
+    without one are counted again. Returns the KeyResults and the updated
+    hash indexes, or None if the table has to be searched again. Pseudo-primary-keys that were below --precision before are not
+    looked at again, as long as all primary keys hold.
+    """
+    meta, indexes = state
+    if (meta["version"] != __version__ or meta["sheet"] != str(sheetname) or meta["names"] != [str(n) for n in search.names]
+            or meta["columnlist"] != search.columnlist or meta["searchlist"] != search.searchlist or meta["maxcolumns"] != search.maxcolumns or meta["precision"] != search.precision):
+        print("NOTE: The scan state was saved with other options or for another table, searching again ...")
+        return None
+    if not meta.get("exhaustive") or "counts" not in meta:
+        print("NOTE: The scan state was saved by a search that was not exhaustive, searching again ...")
+        return None
+    old = meta["rows"]
+    if search.rows < old:
+        print("NOTE: The table has fewer rows than the saved scan state, searching again ...")
+        return None
+    
+    entries = [(tuple(k), True) for k in meta["keys"]] + [(tuple(k), False) for k in meta["pseudokeys"]]
+    results = []
+    updated = {}
+    for (keycolumns, key), checksum, distinct, index in zip(entries, meta["checksums"], meta["counts"], indexes):
+        hashes = search.table.Hashes(keycolumns, 0, search.rows)
+        if int(np.sum(hashes[:old], dtype=np.uint64)) != checksum:
+            print("NOTE: Rows of the table changed since the scan state was saved, searching again ...")
+            return None
+        if index is not None and search.rows > old:
+            added = SortedHashes(hashes[old:])
+            positions = np.searchsorted(index, added)
+            known = np.zeros(len(added), dtype=bool)
+            inside = positions < len(index)
+            known[inside] = index[positions[inside]] == added[inside]
+            if key and (len(added) < search.rows - old or known.any()):
+                print("NOTE: Column(s)", " + ".join([str(c+1) for c in keycolumns]), "are no primary key anymore, searching again ...")
+                return None
+            index = np.insert(index, positions[~known], added[~known]) # stays sorted
+            distinct = len(index)
+        elif search.rows > old:
+            distinct = search.evaluator.CountDistinct(keycolumns)
+        if index is not None:
+            updated[keycolumns] = index
+        if key or distinct >= search.minimum:
+            results.append(search.Result(keycolumns, distinct))
+    print("Checked {} new row(s) against the saved scan state.".format(search.rows - old))
+    return results, updated
+
+
+def PrintKey(title, result, search=None, duplicates=None):
+    """
+    Prints a KeyResult and, with its KeySearch, the columns that can
+    replace its columns and the groups of <duplicates> (see
+    KeySearch.Duplicates()). Row numbers count the header as row 1.
+    """
+    print(title)
+    print(" Columnname:\t'{0}'".format("'  +  '".join([str(name) for name in result.names])))
+    print(" Columnindex:\t{0}".format(" + ".join([str(x+1) for x in result.columns])))
+    print(" Columnletter:\t{0}".format(" + ".join([IndexToExcelLetter(idx+1) for idx in result.columns])))
+    for c in result.columns:
+        if search is not None and c in search.equivalents:
+            group = [c] + search.equivalents[c]
+            print(" Equivalent:\t'{0}' ({1})".format("' = '".join([str(search.names[x]) for x in group]), " = ".join([IndexToExcelLetter(x+1) for x in group])))
+    for rows, values in duplicates or []:
+        numbers = ", ".join([str(r+2) for r in rows[:10]])
+        if len(rows) > 10:
+            numbers += ", ... ({} rows)".format(len(rows))
+        print(" Duplicate:\t'{0}' in rows {1}".format("'  +  '".join([str(v) for v in values]), numbers))
+    print()
+
+
+def WriteDuplicates(filepath, records):
+    """ Writes the groups of duplicates of every suggestion with one line per row """
+    with open(filepath, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["suggestion", "columnname", "columnindex", "group", "row", "values"])
+        for number, result, duplicates in records:
+            for group, (rows, values) in enumerate(duplicates, 1):
+                for r in rows:
+                    writer.writerow([number, " + ".join([str(name) for name in result.names]), " + ".join([str(c+1) for c in result.columns]),
+                                     group, r+2, " + ".join([str(v) for v in values])])
+
+
+def CalibrateScan(evaluator, cardinalities, rows, columnlist, maxcolumns, minimum, approximate=False, samples=3):
+    """
+    Times a few real evaluations of every width with <evaluator> and
+    returns {width: [viable combinations, seconds per combination]}.
+    Two combinations with the same prefix are evaluated and only the
+    second one is timed, since the scan reuses the partition of a
+    prefix for all of its extensions as well.
+    """
+    generator = random.Random(0)
+    perwidth = {}
+    for width in range(1, maxcolumns+1):
+        viable = PredictCombinations(columnlist, width, cardinalities, minimum)[1] - PredictCombinations(columnlist, width-1, cardinalities, minimum)[1]
+        if width == 1 or viable == 0:
+            perwidth[width] = [viable, 0.0] # the distinct values of single columns are known
+            continue
+        timings = []
+        for attempt in range(samples * 20):
+            if len(timings) >= samples:
+                break
+            keycolumns = tuple(sorted(generator.sample(columnlist, width)))
+            lasts = [c for c in columnlist if c > keycolumns[-2] and ViableCombination(keycolumns[:-1] + (c,), cardinalities, minimum)]
+            if len(lasts) < 2:
+                continue
+            first, second = generator.sample(lasts, 2)
+            EvaluateCombination(evaluator, keycolumns[:-1] + (first,), rows, minimum, approximate)
+            start_time = time.time()
+            EvaluateCombination(evaluator, keycolumns[:-1] + (second,), rows, minimum, approximate)
+            timings.append(time.time() - start_time)
+        perwidth[width] = [viable, sorted(timings)[len(timings) // 2] if timings else 0.0]
+    return perwidth
+
+
+class ScanClock:
+    """
+    Predicts the duration of a scan from the calibration of CalibrateScan()
+    and corrects the prediction with the real speed while the scan runs.
+    """
+    def __init__(self, perwidth, jobs=1):
+        self.perwidth = perwidth
+        self.jobs = jobs
+        self.predicted = sum(v * t for v, t in perwidth.values()) / jobs
+        self.done = 0.0 # predicted seconds of the combinations done so far
+        self.resumed = 0.0 # predicted seconds done before a resumed scan
+        self.start_time = None
+    
+    def Resume(self, done):
+        """ Leaves out the predicted seconds <done> of the combinations that a resumed scan skips """
+        self.resumed = done
+        self.predicted = max(self.predicted - done, 0.0)
+        
+    def Start(self):
+        self.start_time = time.time()
+        
+    def Update(self, keycolumns, status):
+        """ Marks <keycolumns> as done. Pruned combinations were never part of the prediction """
+        if status != "pruned":
+            self.done += self.perwidth[len(keycolumns)][1] / self.jobs
+    
+    def Remaining(self):
+        """ Returns the predicted remaining seconds """
+        remaining = max(self.predicted - self.done, 0.0)
+        if self.start_time is None or self.done <= 0:
+            return remaining
+        return remaining * (time.time() - self.start_time) / self.done
+
+
+class ScanProfile:
+    """
+    Records where the time of a scan goes: the duration of every phase
+    (opening, encoding, ...) and, per width of the combinations, how many
+    combinations got which status, the seconds spent on them and the
+    rows of the stripped partitions that were processed. Save() writes everything as JSON that can
+    also be opened as trace in chrome://tracing or ui.perfetto.dev.
+    """
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.phases = [] # [name, start, seconds]
+        self.current = None
+        self.levels = {} # width -> {"statuses": {status: [count, seconds]}, "rows": n, "start": s, "stop": s}
+        self.last = None
+    
+    def Start(self, phase):
+        """ Ends the running phase and starts <phase> """
+        self.Stop()
+        self.current = [phase, time.perf_counter() - self.origin, 0.0]
+        self.last = None
+    
+    def Stop(self):
+        if self.current is not None:
+            self.current[2] = time.perf_counter() - self.origin - self.current[1]
+            self.phases.append(self.current)
+            self.current = None
+    
+    def Count(self, keycolumns, status, rows):
+        """
+        Counts one combination of the scan. The time since the previous
+        combination is spent on this one: generating and pruning it for
+        "skipped" and "pruned", evaluating it otherwise. <rows> are the
+        rows its evaluation handled, None when they are not known (the
+        worker processes of --jobs count on their own).
+        """
+        now = time.perf_counter() - self.origin
+        if self.last is None:
+            self.last = self.current[1] if self.current is not None else now
+        level = self.levels.setdefault(len(keycolumns), {"statuses": {}, "rows": 0, "start": self.last, "stop": now})
+        counter = level["statuses"].setdefault(status, [0, 0.0])
+        counter[0] += 1
+        counter[1] += now - self.last
+        level["rows"] = None if rows is None or level["rows"] is None else level["rows"] + rows
+        level["stop"] = now
+        self.last = now
+    
+    def PeakMemory(self):
+        """
+        Returns the peak resident memory in bytes of this process and of
+        the largest of its finished worker processes, or None. Both peaks
+        can be at different times, so they are not added up.
+        """
+        if resource is None:
+            return None
+        scale = 1 if sys.platform == "darwin" else 1024 # kilobytes except on macOS
+        return {"main_process": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+                "largest_worker": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale}
+    
+    def Save(self, filepath):
+        self.Stop()
+        levels = {}
+        events = []
+        for name, start, seconds in self.phases:
+            events.append({"name": name, "cat": "phase", "ph": "X", "ts": start * 1e6, "dur": seconds * 1e6, "pid": 1, "tid": 1})
+        for width, level in sorted(self.levels.items()):
+            statuses = {status: {"count": count, "seconds": seconds} for status, (count, seconds) in level["statuses"].items()}
+            levels[width] = {"combinations": sum(count for count, seconds in level["statuses"].values()), "statuses": statuses, "rows_touched": level["rows"]}
+            events.append({"name": "{} column(s)".format(width), "cat": "level", "ph": "X", "ts": level["start"] * 1e6,
+                           "dur": (level["stop"] - level["start"]) * 1e6, "pid": 1, "tid": 2, "args": dict(levels[width], statuses={s: v["count"] for s, v in statuses.items()})})
+        report = {"version": __version__,
+                  "phases": {name: seconds for name, start, seconds in self.phases},
+                  "levels": levels,
+                  "rows_touched": None if any(level["rows"] is None for level in self.levels.values()) else sum(level["rows"] for level in self.levels.values()),
+                  "peak_memory": self.PeakMemory(),
+                  "traceEvents": events}
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
 
 
-def ColumnCombinations(items, n):
-    """ Wrapper for itertools.combinations() to suit our need """
-    for i in range(1, n+1):
-        for b in itertools.combinations(items, i):
-            yield b
-            
-            
 def ParseColumnIndexes(userstring, _min, _max):
     """ 
     Parses string where user specifies the column indexes to be scanned 
@@ -303,67 +2352,97 @@ def ParseColumnIndexes(userstring, _min, _max):
     
         
 
-def Main(filepath, sheetname, maxcolumns, precision, usercolumns, verbose, sort):
+def CheckpointIdentity(filepath, sheetname, search):
+    """ Returns what a checkpoint must match to be resumed: the file, the worksheet and the options """
+    stat = os.stat(filepath)
+    return {"version": __version__, "file": os.path.abspath(filepath), "sheet": str(sheetname),
+            "mtime": stat.st_mtime_ns, "size": stat.st_size, "columnlist": search.columnlist,
+            "searchlist": search.searchlist, "maxcolumns": search.maxcolumns,
+            "precision": search.precision, "approximate": search.approximate}
+
+
+def SaveCheckpoint(checkpointfile, identity, position, found, candidates, done):
+    """
+    Saves the state of a scan to <checkpointfile>: the amount of
+    combinations done (<position>), the primary keys <found> in them, the
+    best pseudo-primary-keys (the <candidates>) and the predicted seconds
+    <done>. Results of later combinations are left out. The file is
+    replaced at once, so a killed process never leaves half a checkpoint.
+    """
+    keys = [[number, list(result.columns)] for number, result in found if number < position]
+    pseudokeys = [[distinct, -order, list(keycolumns), exact] for distinct, order, keycolumns, exact in candidates.heap if -order < position]
+    checkpoint = dict(identity, position=position, keys=keys, candidates=pseudokeys, done=done)
+    temporary = checkpointfile + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(temporary, checkpointfile)
+
+
+def LoadCheckpoint(checkpointfile, identity):
+    """ Returns the checkpoint saved by SaveCheckpoint() if it matches <identity>, else None """
+    try:
+        with open(checkpointfile, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        print("NOTE: No checkpoint found at {}, starting a new scan ...".format(checkpointfile))
+        return None
+    if any(checkpoint.get(k) != v for k, v in identity.items()):
+        print("NOTE: The file or the options changed since the checkpoint was saved, starting a new scan ...")
+        return None
+    return checkpoint
+
+
+def Main(filepath, sheetname, maxcolumns, precision, usercolumns, verbose, sort, jobs=1, memory=None, samplesize=10000, approximate=False, cachesize=None, suggestions=False, top=100, statefile=None, profilefile=None, cprofilefile=None, checkpointfile=None, resume=False, timebudget=None, discover=False, duplicates=0, duplicatesfile=None):
     combinations = 0 # counts combinations
-    rowitems = [] # stores rowitems for every column combination. Gets reset for every new column combination.
-    colname = "" # holds concatenated row item which are then appended to <rowitems>. Gets reset for every new row.
-    primarykeys = 0 # total amount of primary keys found
-    pseudokeys = 0 # total amount of pseudo-primary-keys found
-    foundkeys = [] # keeps track of all found primary key column index
+    primarykeys = 0 # total amount of primary keys found, with their equivalent columns (see Count())
+    pseudokeys = 0 # total amount of pseudo-primary-keys found, likewise
+    suggested = 0 # suggestions printed as soon as they are found (--sort 2)
+    estimated = 0 # pseudo-primary-keys of which only a sketch estimate is known (--approximate)
     primarykeys_results = [] # stores all primary keys so we can print them at the end
-    pseudokeys_results = [] # stores all keys that are close to being primary keys so ...
-    keystring = "" # holds the (combined) primary keys
-    flag = False # used to skip certain keys when the already have been checked
+    pseudokeys_results = TopKeys(top) # keeps the best <top> keys that are close to being primary keys so ...
+    hashed = None # spill files of the out-of-core mode (--memory)
+    table = None # the encoded table. Readers that encode while reading set it directly
+    profile = ScanProfile() # timings of the phases and levels (--profile)
+    duplicaterecords = [] # [suggestion number, KeyResult, groups] for the --duplicates-file
+    profile.Start("open")
     
-    print("Opening", os.path.basename(filepath), "...")
-    
-    if filepath.endswith(".xlsb"):
-        try:
-            with open_xlsb(filepath) as wb:
-                try:
-                    with wb.get_sheet(sheetname) as sheet:
-                        for r in sheet.rows(sparse=True):
-                            columns = [c.v for c in r]
-                            break
-                        df = pd.DataFrame([[c.v for c in r] for i, r in enumerate(sheet.rows(sparse=True)) if i > 0], columns=columns)
-                except (ValueError, IndexError):
-                    print("ERROR: The given worksheet does not exist:", sheetname)
-                    print(os.path.basename(filepath), "has the following worksheets:")
-                    for i, s in enumerate(wb.sheets, 1):
-                        print("{}:\t{}".format(i, s))
-                    return (-1, -1) # cancel program code
-        except Exception:
-            print("ERROR: Could not open file:", filepath)
-            return (-1, -1)
+    # Use the parsed and encoded table of an earlier run if there is one (--cache)
+    cachekey = None
+    if cachesize and not (filepath.endswith(".csv") and memory):
+        cachekey = CacheKey(filepath, sheetname)
+        table = LoadCachedTable(CacheDirectory(), cachekey)
+    cached = table is not None
+    # With --range only the column names are read first and then just the
+    # selected columns, unless the cache needs every column of the table
+    headeronly = (filepath.endswith(".csv") and bool(memory)) or (bool(usercolumns) and cachekey is None)
     
-    if filepath.endswith((".xls", ".xlsx")):
+    if cached:
+        print("Opening", os.path.basename(filepath), "from cache ...")
+    else:
+        print("Opening", os.path.basename(filepath), "...")
         try:
-            if isinstance(sheetname, int):
-                df = pd.read_excel(filepath, sheet_name=sheetname-1)
-            else:
-                df = pd.read_excel(filepath, sheet_name=sheetname)
-        except Exception:
+            data = ReadTable(filepath, sheetname, headeronly=headeronly)
+        except WorksheetNotFound:
             print("ERROR: The given worksheet does not exist:", sheetname)
             print(os.path.basename(filepath), "has the following worksheets:")
-            for i, s in enumerate(pd.ExcelFile(filepath).sheet_names, 1): 
+            for i, s in enumerate(ListWorksheets(filepath), 1):
                 print("{}:\t{}".format(i, s))
-            return (-1, -1)
-                
-    elif filepath.endswith(".csv"):
-        try:
-            df = pd.read_csv(filepath, sep=None, engine="python") # sep=None and engine="python" lets python guess the separator
+            return (-1, -1) # cancel program code
         except Exception:
             print("ERROR: Could not open file:", filepath)
             return (-1, -1)
+        if isinstance(data, EncodedTable):
+            table = data
+        else:
+            df = data
+        del data
         
         
     # Count columns and columns
-    rows, columns = df.shape
-    
-    # Error handling
-    if maxcolumns > columns:
-        maxcolumns = columns
-    
+    if table is None:
+        rows, columns = df.shape
+    else:
+        rows, columns = table.rows, len(table.names)
     
     # Validate columns given by user
     if usercolumns:
@@ -375,9 +2454,66 @@ def Main(filepath, sheetname, maxcolumns, precision, usercolumns, verbose, sort)
     else:
         columnlist = [i for i in range(0, columns)]
     
+    # Now that the columns are known, read just them (encoded like an .xlsb)
+    if table is None and headeronly and not (filepath.endswith(".csv") and memory):
+        try:
+            table = ReadTable(filepath, sheetname, usecols=columnlist)
+        except Exception:
+            print("ERROR: Could not open file:", filepath)
+            return (-1, -1)
+        del df
+    
+    
+    # Factorize every column once into integer codes or, for
+    # the out-of-core mode, hash every column into a spill file
+    profile.Start("encode")
+    if filepath.endswith(".csv") and memory:
+        try:
+            hashed = HashedColumns(filepath, columnlist, memory, samplesize)
+        except Exception:
+            print("ERROR: Could not open file:", filepath)
+            return (-1, -1)
+        rows = hashed.rows
+        table = hashed
+        if jobs > 1:
+            print("NOTE: --jobs is ignored when --memory is given.")
+    else:
+        if table is None and cachekey is not None:
+            # Encode every column, so the cache also serves other --range values
+            table = EncodeColumns(df, range(columns))
+            del df
+            StoreCachedTable(CacheDirectory(), cachekey, table, cachesize)
+        elif table is None:
+            table = EncodeColumns(df, columnlist)
+            del df
+        elif cachekey is not None and not cached:
+            StoreCachedTable(CacheDirectory(), cachekey, table, cachesize)
+        rows = table.rows
+    search = KeySearch(table, columnlist, maxcolumns, precision, jobs, samplesize, approximate)
+    if approximate and precision is not None and not search.approximate:
+        print("NOTE: --approximate is ignored without --memory or when the hashes fit into it, counting exactly is faster there.")
+    if duplicates and hashed is not None:
+        print("NOTE: --duplicates is ignored when --memory is given.")
+    
+    def Count(result):
+        """
+        Returns the amount of keys <result> stands for: itself and the
+        combinations with equivalent columns, which are printed along with
+        it. The spill files of --memory are not checked for equivalent
+        columns, so there every combination counts on its own anyway.
+        """
+        return 1 + len(search.Alternatives(result))
     
-    # Calculate the amount of column combinations    
-    totalcombinations = PredictCombinations(columnlist, maxcolumns)
+    def Suggestion(number, result):
+        """ Prints a pseudo-primary-key with its first groups of duplicates (--duplicates) """
+        groups = search.Duplicates(result, duplicates) if duplicates else None
+        PrintKey("Suggestion #{0} (NOT a primary key, but {1}% of items are unique)".format(number, round(result.precision*100, 8)), result, search, groups)
+        if groups and duplicatesfile:
+            duplicaterecords.append((number, result, groups))
+    
+    # Calculate the amount of column combinations (and how many survive pruning)
+    profile.Start("predict")
+    totalcombinations, viablecombinations = search.Predict()
     
     
     # Print information for user
@@ -385,126 +2521,611 @@ def Main(filepath, sheetname, maxcolumns, precision, usercolumns, verbose, sort)
         print("Scanning worksheet '{0}' with {1} columns and {2} rows ...".format(sheetname, len(columnlist), rows))
     else:
         print("Scanning worksheet '{0}' with {1} ({2} selected) columns and {3} rows ...".format(sheetname, columns, len(columnlist), rows))
+    if search.constants:
+        print("Skipping {} constant column(s):".format(len(search.constants)), ", ".join(["{}({})".format(str(c+1), IndexToExcelLetter(c+1)) for c in search.constants]))
+    if search.equivalents:
+        print("Skipping {} column(s) equivalent to others:".format(sum(len(others) for others in search.equivalents.values())),
+              ", ".join([" = ".join(["{}({})".format(str(x+1), IndexToExcelLetter(x+1)) for x in [c] + others]) for c, others in search.equivalents.items()]))
     if verbose:
-        print("Columns to test:", ", ".join(["{}({})".format(str(c+1), IndexToExcelLetter(c+1)) for c in columnlist]))
-    print("Testing", totalcombinations, "primary keys ...")
+        print("Columns to test:", ", ".join(["{}({})".format(str(c+1), IndexToExcelLetter(c+1)) for c in search.searchlist]))
+    
+    # Find the minimal keys of any width instead of testing combinations (--discover)
+    if discover:
+        if statefile or checkpointfile or timebudget is not None:
+            print("NOTE: --state, --checkpoint, --resume and --time-budget are ignored when --discover is given.")
+        print()
+        print("Discovering the minimal primary keys of any width ...")
+        print()
+        profile.Start("search")
+        for number, result in enumerate(search.Discover(), 1):
+            primarykeys += Count(result)
+            if sort == 3:
+                primarykeys_results.append(result)
+            else:
+                PrintKey("Primary Key #{0}:".format(number), result, search)
+        profile.Start("results")
+        if sort == 3:
+            primarykeys_results.sort(key=lambda x: (len(x.columns), x.columns))
+            for i, result in enumerate(primarykeys_results, 1):
+                PrintKey("Primary Key #{0}:".format(i), result, search)
+        print("{} column combination(s) tested.\n".format(search.evaluations))
+        if primarykeys == 0:
+            print("No primary key found.\n")
+        if hashed is not None:
+            hashed.Close()
+        if profilefile:
+            profile.Save(profilefile)
+            print("Profile saved to", profilefile)
+        return (primarykeys, pseudokeys)
+    
+    # Only check the new rows against the keys of an earlier scan (--state)
+    if statefile and os.path.isfile(statefile):
+        profile.Start("revalidate")
+        state = LoadScanState(statefile)
+        revalidated = RevalidateScan(search, state, sheetname) if state is not None else None
+        if revalidated is not None:
+            results, indexes = revalidated
+            print()
+            for number, result in enumerate([r for r in results if r.key], 1):
+                primarykeys += Count(result)
+                PrintKey("Primary Key #{0}:".format(number), result, search)
+            best = sorted([r for r in results if not r.key], key=lambda x: x.precision, reverse=True)
+            pseudokeys = sum(Count(r) for r in best)
+            shown = best if primarykeys == 0 and sort == 1 or suggestions else []
+            for i, result in enumerate(shown, 1):
+                Suggestion(i, result)
+            if primarykeys == 0:
+                print("No primary key found.\n")
+            SaveScanState(statefile, search, sheetname, results, indexes, [r.columns for r in shown])
+            if duplicatesfile and duplicaterecords:
+                WriteDuplicates(duplicatesfile, duplicaterecords)
+                print("Duplicates saved to", duplicatesfile)
+            if hashed is not None:
+                hashed.Close()
+            if profilefile:
+                profile.Save(profilefile)
+            return (primarykeys, pseudokeys)
+        print()
     
+    print("Testing", totalcombinations, "primary keys ({} after pruning) ...".format(viablecombinations))
     
-    # Calculating expected scanning time
-    start_time = time.time()
-    # The 3 lines below simulate the process of scanning through the columns.
-    # They have no actual purpose other than functioning as a dummy to measure
-    # the duration of one combination to predict the total scan duraction.
-    for testrow in df.itertuples():
-        for testcol in [testi for testi in range(maxcolumns)]:
-            teststr = testcol
-    delta_time = time.time() - start_time
-    expected_seconds = delta_time * totalcombinations
-    expected = ConvertSeconds(expected_seconds)
+    
+    # Calculating expected scanning time by timing a few real combinations
+    profile.Start("calibrate")
+    clock = search.Calibrate()
+    
+    # The best-first search (--time-budget) runs in one process and has no fixed order to resume
+    if timebudget is not None:
+        if jobs > 1:
+            print("NOTE: --jobs is ignored when --time-budget is given.")
+        if checkpointfile:
+            print("NOTE: --checkpoint and --resume are ignored when --time-budget is given.")
+            checkpointfile = None
+    
+    # Continue where a stopped scan left off (--resume)
+    found = [] # [combination number, KeyResult] of every primary key
+    candidates = TopKeys(top) # the best pseudo-primary-keys for --state and --checkpoint
+    start = 0 # amount of combinations done before
+    restored = []
+    if checkpointfile:
+        identity = CheckpointIdentity(filepath, sheetname, search)
+        checkpoint = LoadCheckpoint(checkpointfile, identity) if resume else None
+        if checkpoint is not None:
+            start = checkpoint["position"]
+            restored = [(number, search.Result(keycolumns, search.rows)) for number, keycolumns in checkpoint["keys"]]
+            restored += [(number, search.Result(keycolumns, distinct, exact)) for distinct, number, keycolumns, exact in checkpoint["candidates"]]
+            restored.sort(key=lambda x: x[0])
+            clock.Resume(checkpoint["done"])
+            print("Resuming the scan after {} of {} combinations ...".format(start, totalcombinations))
+    expected = ConvertSeconds(clock.predicted)
     print("Expected scan duration ~ {} {}".format(int(expected[0]), expected[1]))
+    if timebudget is not None:
+        budget = ConvertSeconds(timebudget, 2)
+        print("Time budget {:g} {}, the most promising combinations are tested first".format(budget[0], budget[1]))
     print("Starting scan...")
     print()
     
     
-    # Create all possible combinations of <maxcolumns> columns and test if they are primary keys
-    for keycolumns in ColumnCombinations(columnlist, maxcolumns):
+    def Progress(keycolumns, status, value):
+        """ Draws the progress bar or prints what happens to every combination """
+        nonlocal combinations, lastcheckpoint, touched
+        # The results of all combinations before this one are handled, so this
+        # is the moment to save a checkpoint of a consistent state
+        if checkpointfile and time.time() - lastcheckpoint >= CHECKPOINTINTERVAL:
+            SaveCheckpoint(checkpointfile, identity, combinations, found, candidates, clock.resumed + clock.done)
+            lastcheckpoint = time.time()
         combinations += 1
+        clock.Update(keycolumns, status)
+        if search.jobs > 1 and timebudget is None and status not in ("skipped", "pruned"):
+            profile.Count(keycolumns, status, None)
+        else:
+            profile.Count(keycolumns, status, search.evaluator.touched - touched)
+        touched = search.evaluator.touched
         
         # Draw progress bar if the user choosed so
         if sort == 3:
-            ProgressBar(combinations, totalcombinations, prefix="", suffix="keys tested")
+            remaining = ConvertSeconds(clock.Remaining())
+            ProgressBar(combinations, totalcombinations, prefix="", suffix="keys tested, ~{} {} left".format(int(remaining[0]), remaining[1]))
             if combinations == totalcombinations: print("\n")
-            
-        # Check if <keycolumns> is a subset of of one of
-        # the found PRIMARY-keys, so we can skip it.
-        for key in foundkeys:
-            for k in key:
-                if not k in keycolumns:
-                    break
-            else:
-                _key = key
-                flag = True
-                break
-        
-        # if one of the two for-loops above found a match, skip this iteration
-        if flag:
-            flag = False
-            if verbose and sort != 3:
-                print("Skipping column(s): ", " + ".join([str(c+1) for c in keycolumns]), "because found", " + ".join([str(c+1) for c in _key]), "already before")
-            continue
         
-        if verbose and sort != 3:
+        if not verbose or sort == 3:
+            return
+        if status == "skipped": # One of the found PRIMARY-keys is a subset of <keycolumns>
+            print("Skipping column(s): ", " + ".join([str(c+1) for c in keycolumns]), "because found", " + ".join([str(c+1) for c in value]), "already before")
+        elif status == "pruned": # Too few distinct values to be a (pseudo-)primary key
+            print("Skipping column(s): ", " + ".join([str(c+1) for c in keycolumns]), "because they have too few distinct values")
+        elif status == "rejected": # The row sample already has too many duplicates
+            print("Skipping column(s): ", " + ".join([str(c+1) for c in keycolumns]), "because the row sample has too many duplicates")
+        else:
             print("Testing column(s): ", " + ".join([str(c+1) for c in keycolumns]))
-        
-        # Create primary keys for each row
-        for row in df.itertuples():
-            for c in keycolumns:
-                keystring += str(row[c+1])
-            if len(keystring) > 0:
-                rowitems.append(keystring)
-            keystring = ""
-            
-        # Create a new list with all the duplicate rowitems removed.
-        setrow = list(set(rowitems))
-        
-        # If the length of the new list is equal to the total length of rows, a primary key was found
-        if len(setrow) == rows:
-            primarykeys += 1
-            foundkeys.append(keycolumns)
+    
+    
+    def Handle(number, result):
+        """ Prints or stores the KeyResult of the combination with the index <number> """
+        nonlocal primarykeys, pseudokeys, estimated, suggested
+        if result.key:
+            found.append((number, result))
+            primarykeys += Count(result)
             if sort == 3:
-                primarykeys_results.append(["'  +  '".join([str(df.columns[idx]) for idx in keycolumns]),
-                                            " + ".join([str(x+1) for x in keycolumns]),
-                                            " + ".join([IndexToExcelLetter(idx+1) for idx in keycolumns]),
-                                            ])
+                primarykeys_results.append(result)
             else:
-                print("Primary Key #{0}:".format(primarykeys))
-                print(" Columnname:\t'{0}'".format("'  +  '".join([str(df.columns[idx]) for idx in keycolumns])))
-                print(" Columnindex:\t{0}".format(" + ".join([str(x+1) for x in keycolumns])))
-                print(" Columnletter:\t{0}".format(" + ".join([IndexToExcelLetter(idx+1) for idx in keycolumns])))
-                print()
-        elif len(setrow)/rows >= precision: # close to being a primary key. Ie. <precision>*100 (%) of the items are unique
-            pseudokeys += 1
-            if sort == 2:
-                print("Suggestion #{0} (NOT a primary key, but {1}% of items are unique)".format(pseudokeys, round(len(setrow)/rows*100, 8)))
-                print(" Columnname:\t'{0}'".format("'  +  '".join([str(df.columns[idx]) for idx in keycolumns])))
-                print(" Columnindex:\t{0}".format(" + ".join([str(x+1) for x in keycolumns])))
-                print(" Columnletter:\t{0}".format(" + ".join([IndexToExcelLetter(idx+1) for idx in keycolumns])))
-                print()
+                PrintKey("Primary Key #{0}:".format(len(found)), result, search)
+        else: # close to being a primary key. Ie. <precision>*100 (%) of the items are unique
+            candidates.Add(result, number)
+            pseudokeys += Count(result)
+            if not result.exact:
+                estimated += Count(result)
+            if sort == 2 and result.exact:
+                suggested += 1
+                Suggestion(suggested, result)
             else:
-                pseudokeys_results.append(["'  +  '".join([str(df.columns[idx]) for idx in keycolumns]),
-                                         " + ".join([str(x+1) for x in keycolumns]),
-                                         " + ".join([IndexToExcelLetter(idx+1) for idx in keycolumns]),
-                                         len(setrow)/rows
-                                         ])              
-        
-        # Reset rowitems for next column
-        rowitems.clear()
+                pseudokeys_results.Add(result, number)
+    
+    
+    # Create all possible combinations of <maxcolumns> columns and test if they are primary keys
+    for number, result in restored:
+        Handle(number, result)
+    combinations = start
+    lastcheckpoint = time.time()
+    profile.Start("search")
+    profiler = cProfile.Profile() if cprofilefile else None # only profiles the evaluation loop (--cprofile)
+    if profiler is not None:
+        if jobs > 1 and timebudget is None:
+            print("NOTE: --cprofile only profiles the main process, not the --jobs worker processes.")
+        profiler.enable()
+    touched = search.evaluator.touched # rows handled before the scan, eg. by the calibration
+    clock.Start()
+    try:
+        for result in search.Results(Progress, start, [r.columns for number, r in found], timebudget):
+            Handle(combinations - 1, result)
+    except KeyboardInterrupt:
+        if checkpointfile:
+            # The result of the last combination may not be handled completely
+            SaveCheckpoint(checkpointfile, identity, max(combinations - 1, start), found, candidates, clock.resumed + clock.done)
+            print("\nCheckpoint saved to {}, continue the scan with --resume".format(checkpointfile))
+        raise
+    if checkpointfile and os.path.isfile(checkpointfile):
+        os.remove(checkpointfile) # the scan is complete
         
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(cprofilefile)
+    profile.Start("results")
+    
+    best = pseudokeys_results.Results(search) # sorted in descending order by uniqueness
+    if search.approximate:
+        # Replace the estimates of the Top-<top> by exact counts. Only those
+        # count as suggestions, and an estimate that fell short of a primary
+        # key turns out to be a primary key after all
+        verified = [search.Verify(result) for result in best]
+        pseudokeys -= estimated
+        for result, exact in zip(best, verified):
+            if exact.key:
+                found.append((combinations, exact))
+                primarykeys += Count(exact)
+                if sort == 3:
+                    primarykeys_results.append(exact)
+                else:
+                    PrintKey("Primary Key #{0}:".format(len(found)), exact, search)
+            elif not result.exact and exact.precision >= precision:
+                pseudokeys += Count(exact)
+        best = sorted([r for r in verified if r.precision >= precision and not r.key], key=lambda x: x.precision, reverse=True)
+    
     if sort == 3:
-        for i, key in enumerate(primarykeys_results, 1):
-            print("Primary Key #{0}:".format(i))
-            print(" Columnname:\t'{0}'".format(key[0]))
-            print(" Columnindex:\t{0}".format(key[1]))
-            print(" Columnletter:\t{0}".format(key[2]))
-            print()
+        for i, result in enumerate(primarykeys_results, 1):
+            PrintKey("Primary Key #{0}:".format(i), result, search)
     
-    if primarykeys == 0 and sort == 1 or suggestions:
-        pseudokeys_results.sort(key=lambda x: x[3], reverse=True) # sort list in descending order by uniqueness
-        for i, key in enumerate(pseudokeys_results, 1):
-            if i >= 100: break # Only show the Top-100 pseudo-keys
-            print("Suggestion #{0} (NOT a primary key, but {1}% of items are unique)".format(i, round(key[3]*100, 8)))
-            print(" Columnname:\t'{0}'".format(key[0]))
-            print(" Columnindex:\t{0}".format(key[1]))
-            print(" Columnletter:\t{0}".format(key[2]))
-            print()
+    shown = best if primarykeys == 0 and sort == 1 or suggestions else []
+    for i, result in enumerate(shown, 1):
+        Suggestion(i, result)
+    
+    if timebudget is not None and not search.exhaustive:
+        if sort == 3: print("\n")
+        print("The time budget ran out after {} of {} combinations. The search was NOT exhaustive,".format(combinations, totalcombinations))
+        print("there can be more primary keys and better suggestions.\n")
+    elif timebudget is not None:
+        print("The search was exhaustive: every combination was tested within the time budget.\n")
     
     if primarykeys == 0:
         if verbose: print()
         print("No primary key found.\n")
+    
+    if statefile and search.exhaustive is False:
+        # A later scan would take the keys of the cut short search for all there are
+        print("NOTE: The scan state is not saved, since the search was not exhaustive.\n")
+    elif statefile:
+        profile.Start("state")
+        SaveScanState(statefile, search, sheetname, [result for number, result in found] + candidates.Results(search), shown=[r.columns for r in shown])
+    
+    if duplicatesfile and duplicaterecords:
+        WriteDuplicates(duplicatesfile, duplicaterecords)
+        print("Duplicates saved to", duplicatesfile)
+    
+    if hashed is not None:
+        hashed.Close()
+    
+    if profilefile:
+        profile.Save(profilefile)
+        print("Profile saved to", profilefile)
                 
     return (primarykeys, pseudokeys) # Return amount of found keys
                 
 
+def BatchFiles(spec):
+    """
+    Resolves the input of the batch mode to a list of table files. <spec>
+    can be a directory (searched recursively), a manifest (.txt/.lst file
+    with one path per line, # starts a comment) or a glob pattern.
+    """
+    if os.path.isdir(spec):
+        files = [os.path.join(root, name) for root, dirs, names in os.walk(spec) for name in names]
+    elif os.path.isfile(spec) and spec.lower().endswith((".txt", ".lst")):
+        with open(spec, encoding="utf-8") as f:
+            lines = [line.strip() for line in f]
+        base = os.path.dirname(os.path.abspath(spec))
+        files = [os.path.join(base, line) for line in lines if line and not line.startswith("#")]
+    else:
+        files = glob.glob(spec, recursive=True)
+    # Skip temporary lock files of Excel (~$book.xlsx)
+    return sorted(set(f for f in files if f.lower().endswith(EXCELTYPES) and os.path.isfile(f) and not os.path.basename(f).startswith("~$")))
+
+
+def _LoadWorkbook(task):
+    """
+    Batch mode, first phase: opens a workbook only once, encodes every
+    worksheet and stores it in the table cache at <directory>. Returns
+    [filepath, sheetname, rows, columns, cache key or error message].
+    """
+    filepath, directory, limit = task
+    tables = []
+    try:
+        if filepath.lower().endswith(".xlsb"):
+            with open_xlsb(filepath) as wb:
+                for sheetname in wb.sheets:
+                    with wb.get_sheet(sheetname) as sheet:
+                        tables.append((sheetname, ReadXlsbSheet(sheet)))
+        elif filepath.lower().endswith((".xls", ".xlsx")):
+            for sheetname, df in pd.read_excel(filepath, sheet_name=None).items(): # one open for all sheets
+                tables.append((sheetname, EncodeColumns(df, range(df.shape[1]))))
+        else:
+            df = ReadTable(filepath, 1)
+            tables.append((1, EncodeColumns(df, range(df.shape[1]))))
+    except Exception as e:
+        return [[filepath, None, 0, 0, "ERROR: Could not open file: {}".format(e)]]
+    loaded = []
+    for sheetname, table in tables:
+        key = CacheKey(filepath, sheetname)
+        if LoadCachedTable(directory, key) is None:
+            StoreCachedTable(directory, key, table, limit)
+        loaded.append([filepath, sheetname, table.rows, len(table.names), key])
+    return loaded
+
+
+def _ScanBatchTable(task):
+    """
+    Batch mode, second phase: scans one table from the table cache and
+    returns [filepath, sheetname, rows, columns, KeyResults or error message].
+    """
+    (filepath, sheetname, rows, columns, key), directory, maxcolumns, precision, suggestions, samplesize, approximate, top = task
+    table = LoadCachedTable(directory, key)
+    if table is None:
+        return [filepath, sheetname, rows, columns, "ERROR: The table was evicted from the cache, increase --cache"]
+    search = KeySearch(table, range(columns), maxcolumns, precision, 1, samplesize, approximate)
+    primarykeys = []
+    best = TopKeys(top)
+    for result in search.Results():
+        if result.key:
+            primarykeys.append(result)
+        else:
+            best.Add(result)
+    # An estimate can fall short of a primary key (see Main())
+    pseudokeys = [search.Verify(r) for r in best.Results(search)]
+    primarykeys += [r for r in pseudokeys if r.key]
+    # Like --sort 1: suggestions only when asked for or when there is no primary key
+    if primarykeys and not suggestions:
+        pseudokeys = []
+    pseudokeys = sorted([r for r in pseudokeys if not r.key and r.precision >= precision], key=lambda x: x.precision, reverse=True)
+    # The report lists every combination, also those with equivalent columns
+    results = []
+    for result in primarykeys + pseudokeys:
+        results.append(result)
+        results.extend(search.Alternatives(result))
+    return [filepath, sheetname, rows, columns, results]
+
+
+def Batch(spec, maxcolumns, precision, suggestions, jobs, samplesize, approximate, cachesize, report, top=100, inclusions=None):
+    """
+    Scans every worksheet of every table file given by <spec> (see
+    BatchFiles()) with one pool of <jobs> processes. Every workbook is
+    opened once and its encoded worksheets go through the table cache
+    (a temporary one without --cache), then the tables are scanned in
+    the pool, largest first. All results are written to one <report>
+    (.csv or .json). With an <inclusions> report the inclusion
+    dependencies between the tables are searched as well (see
+    FindInclusions()). Returns the amount of tables.
+    """
+    files = BatchFiles(spec)
+    if not files:
+        print("ERROR: No table files found for", spec)
+        return -1
+    files.sort(key=os.path.getsize, reverse=True) # largest first
+    print("Scanning {} file(s) with {} process(es) ...".format(len(files), jobs))
+    if approximate:
+        print("NOTE: --approximate is ignored with --batch, the tables are counted exactly in memory.")
+    
+    temporary = None
+    if cachesize:
+        directory, limit = CacheDirectory(), cachesize
+    else:
+        temporary = tempfile.TemporaryDirectory(prefix="primarykey-batch-")
+        directory, limit = temporary.name, float("inf")
+    
+    records = []
+    tables = []
+    try:
+        with multiprocessing.Pool(jobs) as pool:
+            for loaded in pool.imap_unordered(_LoadWorkbook, [(f, directory, limit) for f in files]):
+                for entry in loaded:
+                    if entry[1] is None:
+                        print(entry[4], entry[0])
+                        records.append(entry)
+                    else:
+                        tables.append(entry)
+            
+            tables.sort(key=lambda x: x[2] * x[3], reverse=True) # largest first
+            tasks = [(entry, directory, maxcolumns, precision, suggestions, samplesize, approximate, top) for entry in tables]
+            for i, record in enumerate(pool.imap_unordered(_ScanBatchTable, tasks), 1):
+                filepath, sheetname, rows, columns, results = record
+                if isinstance(results, str):
+                    summary = results
+                else:
+                    summary = "{} primary key(s), {} suggestion(s)".format(sum(1 for r in results if r.key), sum(1 for r in results if not r.key))
+                print("[{}/{}] {} - '{}' ({} rows, {} columns): {}".format(i, len(tables), os.path.basename(filepath), sheetname, rows, columns, summary))
+                records.append(record)
+            
+            if inclusions:
+                # The tables are still in the cache, the temporary one is removed below
+                scanned = [record for record in records if not isinstance(record[4], str)]
+                print("Searching inclusion dependencies between {} table(s) ...".format(len(scanned)))
+                found = FindInclusions([(entry, LoadCachedTable(directory, entry[4])) for entry in tables], scanned)
+    finally:
+        if temporary is not None:
+            temporary.cleanup()
+    
+    WriteBatchReport(report, records)
+    print("Report saved to", report)
+    if inclusions:
+        WriteInclusionReport(inclusions, found)
+        print("{} inclusion dependencie(s) saved to {}".format(len(found), inclusions))
+    return len(tables)
+
+
+def WriteBatchReport(report, records):
+    """ Writes the results of Batch() as one CSV or JSON file """
+    rows = []
+    for filepath, sheetname, tablerows, columns, results in sorted(records, key=lambda x: (x[0], str(x[1]))):
+        base = {"file": filepath, "worksheet": sheetname, "rows": tablerows, "columns": columns}
+        if isinstance(results, str):
+            rows.append(dict(base, worksheet=sheetname or "", type="error", precision=None, columnname=results, columnindex="", columnletter=""))
+        elif not results:
+            rows.append(dict(base, type="none", precision=None, columnname="", columnindex="", columnletter=""))
+        for result in ([] if isinstance(results, str) else results):
+            rows.append(dict(base, type="primary key" if result.key else "suggestion", precision=result.precision,
+                             columnname=" + ".join([str(name) for name in result.names]),
+                             columnindex=" + ".join([str(x+1) for x in result.columns]),
+                             columnletter=" + ".join([IndexToExcelLetter(idx+1) for idx in result.columns])))
+    if report.lower().endswith(".json"):
+        with open(report, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2, default=str)
+    else:
+        pd.DataFrame(rows, columns=["file", "worksheet", "rows", "columns", "type", "precision", "columnname", "columnindex", "columnletter"]).to_csv(report, index=False)
+
+
+def InclusionHashes(table, c):
+    """
+    Returns a 64 bit hash of every unique value of column <c> of an
+    EncodedTable and whether it is not empty. Whole numbers hash the same
+    in every table, no matter if they were read as int, float (1.0) or
+    text, so a key column matches the column of a CSV file with gaps.
+    """
+    values = []
+    for u in table.uniques[c]:
+        if isinstance(u, (float, np.floating)) and u == u and float(u).is_integer():
+            u = int(u)
+        values.append(str(u))
+    present = ~pd.isna(pd.Series(table.uniques[c], dtype=object)).to_numpy()
+    return pd.util.hash_array(np.array(values, dtype=object)), present
+
+
+def ValueIndex(table, c):
+    """
+    Returns the sorted hashes of the distinct values of column <c> (see
+    InclusionHashes()). Empty cells are left out, they do not reference
+    anything.
+    """
+    hashes, present = InclusionHashes(table, c)
+    return np.unique(hashes[present])
+
+
+def ValueRange(table, c):
+    """
+    Returns the kind of the values of column <c> ("number" or "text") and
+    its lowest and highest value, numbers as floats (rounding keeps their
+    order) and text compared lexicographically. Columns with other or
+    mixed kinds of values return (None, None, None).
+    """
+    _, present = InclusionHashes(table, c)
+    values = pd.Series(table.uniques[c], dtype=object)[present]
+    if not len(values):
+        return None, None, None
+    kind = pd.api.types.infer_dtype(values, skipna=False)
+    if kind in ("integer", "floating", "mixed-integer-float"):
+        try:
+            numbers = values.astype(float)
+        except OverflowError:
+            return None, None, None
+        return "number", numbers.min(), numbers.max()
+    if kind == "string":
+        return "text", values.min(), values.max()
+    return None, None, None
+
+
+def ContainsValues(container, values, chunksize=1 << 16):
+    """
+    Tests whether all sorted <values> are part of the sorted <container>,
+    in chunks that start small and double up to <chunksize>. The hashes
+    are spread randomly, so most non-containments stop after a few values.
+    """
+    if len(values) == 0:
+        return True
+    if len(container) == 0:
+        return False
+    start, size = 0, 16
+    while start < len(values):
+        chunk = values[start:start+size]
+        positions = np.minimum(np.searchsorted(container, chunk), len(container) - 1)
+        if not np.array_equal(container[positions], chunk):
+            return False
+        start, size = start + size, min(size * 2, chunksize)
+    return True
+
+
+def InclusionRows(table, keycolumns):
+    """ Returns the mixed InclusionHashes() of <keycolumns> for every row and whether none of them is empty """
+    hashes, present = None, np.ones(table.rows, dtype=bool)
+    for c in keycolumns:
+        values, nonempty = InclusionHashes(table, c)
+        hashes = values[table.codes[c]] if hashes is None else MixHashes(hashes, values[table.codes[c]])
+        present &= nonempty[table.codes[c]]
+    return hashes, present
+
+
+def FindInclusions(tables, records):
+    """
+    Finds the inclusion dependencies between <tables> ([batch entry,
+    EncodedTable] of Batch()): every column whose values all appear in a
+    column of another table, and every combination of columns whose value
+    combinations all appear in a multi-column primary key of another
+    table (taken from the Batch() <records>). Every column is turned into
+    a sorted index of its distinct value hashes (see ValueIndex()) once.
+    Only columns with at least as many distinct values and a hash range
+    around the hash range of the dependent column can contain it (which
+    rules out pairs of columns with few values) and, if both hold values
+    of the same kind (see ValueRange()), only those whose values range
+    around the values of the dependent column. This rules out most pairs
+    before any values are compared.
+    Constant columns are included in too many columns to tell anything,
+    they are only reported as part of a composite dependency. A composite
+    dependency needs a unary dependency for each of its columns, so only
+    those combinations are tested.
+    Returns [dependent (entry, table), columns, referenced (entry, table),
+    columns, whether the referenced columns are a primary key].
+    """
+    tables = [(entry, table) for entry, table in tables if table is not None]
+    owners, columns, indexes, ranges = [], [], [], []
+    for t, (entry, table) in enumerate(tables):
+        for c in range(len(table.names)):
+            index = ValueIndex(table, c)
+            if len(index):
+                owners.append(t)
+                columns.append(c)
+                indexes.append(index)
+                ranges.append(ValueRange(table, c))
+    owners = np.array(owners, dtype=np.int64)
+    cardinalities = np.array([len(index) for index in indexes], dtype=np.int64)
+    lowest = np.array([index[0] for index in indexes], dtype=np.uint64)
+    highest = np.array([index[-1] for index in indexes], dtype=np.uint64)
+    numbers = np.array([kind == "number" for kind, low, high in ranges], dtype=bool)
+    numberlow = np.array([low if kind == "number" else np.nan for kind, low, high in ranges], dtype=np.float64)
+    numberhigh = np.array([high if kind == "number" else np.nan for kind, low, high in ranges], dtype=np.float64)
+    texts = np.array([kind == "text" for kind, low, high in ranges], dtype=bool)
+    textlow = np.array([low if kind == "text" else "" for kind, low, high in ranges], dtype=object)
+    texthigh = np.array([high if kind == "text" else "" for kind, low, high in ranges], dtype=object)
+    
+    found = []
+    unary = collections.defaultdict(list) # (referenced table, column) -> [(dependent table, column)]
+    for a, index in enumerate(indexes):
+        viable = (owners != owners[a]) & (cardinalities >= cardinalities[a]) & (lowest <= lowest[a]) & (highest >= highest[a])
+        # Values of different kinds can still have equal hashes (1 and "1"), so only
+        # columns of the same kind have to range around the dependent column
+        if numbers[a]:
+            viable &= ~numbers | ((numberlow <= numberlow[a]) & (numberhigh >= numberhigh[a]))
+        elif texts[a]:
+            viable &= ~texts | ((textlow <= textlow[a]) & (texthigh >= texthigh[a]))
+        candidates = np.flatnonzero(viable)
+        for b in candidates:
+            if ContainsValues(indexes[b], index):
+                table = tables[owners[b]][1]
+                if cardinalities[a] > 1:
+                    found.append([tables[owners[a]], (columns[a],), tables[owners[b]], (columns[b],), table.cardinalities[columns[b]] == table.rows])
+                unary[(owners[b], columns[b])].append((owners[a], columns[a]))
+    
+    # Composite dependencies towards the multi-column primary keys
+    position = {(entry[0], entry[1]): t for t, (entry, table) in enumerate(tables)}
+    for filepath, sheetname, _, _, results in records:
+        t = position.get((filepath, sheetname))
+        if t is None:
+            continue
+        table = tables[t][1]
+        for result in results:
+            if not result.key or len(result.columns) < 2:
+                continue
+            referenced = None
+            for s in range(len(tables)):
+                # Columns of table <s> that are included in each key column
+                choices = [[c for o, c in unary[(t, k)] if o == s] for k in result.columns]
+                for dependent in itertools.product(*choices):
+                    if len(set(dependent)) < len(dependent):
+                        continue
+                    if referenced is None:
+                        referenced = np.unique(InclusionRows(table, result.columns)[0])
+                    hashes, present = InclusionRows(tables[s][1], dependent)
+                    if ContainsValues(referenced, np.unique(hashes[present])):
+                        found.append([tables[s], dependent, tables[t], result.columns, True])
+    return found
+
+
+def WriteInclusionReport(report, found):
+    """ Writes the inclusion dependencies of FindInclusions() as one CSV or JSON file """
+    rows = []
+    for (dependent, table), dependentcolumns, (referenced, other), referencedcolumns, key in found:
+        rows.append({"file": dependent[0], "worksheet": dependent[1],
+                     "columnname": " + ".join([str(table.names[x]) for x in dependentcolumns]),
+                     "columnindex": " + ".join([str(x+1) for x in dependentcolumns]),
+                     "columnletter": " + ".join([IndexToExcelLetter(x+1) for x in dependentcolumns]),
+                     "referencedfile": referenced[0], "referencedworksheet": referenced[1],
+                     "referencedcolumnname": " + ".join([str(other.names[x]) for x in referencedcolumns]),
+                     "referencedcolumnindex": " + ".join([str(x+1) for x in referencedcolumns]),
+                     "referencedcolumnletter": " + ".join([IndexToExcelLetter(x+1) for x in referencedcolumns]),
+                     "primarykey": key})
+    if report.lower().endswith(".json"):
+        with open(report, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2, default=str)
+    else:
+        pd.DataFrame(rows, columns=["file", "worksheet", "columnname", "columnindex", "columnletter", "referencedfile", "referencedworksheet",
+                                    "referencedcolumnname", "referencedcolumnindex", "referencedcolumnletter", "primarykey"]).to_csv(report, index=False)
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:          
         print("ERROR: Not enough arguments.")
@@ -523,11 +3144,18 @@ if __name__ == "__main__":
         HelpGerman()
         sys.exit(0)
     
-    if not os.path.isfile(sys.argv[1]):
+    batchspec = None # directory, glob or manifest of the batch mode
+    if sys.argv[1].lower() in ("-b", "--batch"):
+        if len(sys.argv) < 3:
+            print("ERROR: Expected a directory, glob pattern or manifest after", sys.argv[1])
+            sys.exit(1)
+        batchspec = sys.argv[2]
+    
+    elif not os.path.isfile(sys.argv[1]):
         print("ERROR:", sys.argv[1], "is not a file.")
         sys.exit(1)
         
-    if not sys.argv[1].lower().endswith(EXCELTYPES):
+    elif not sys.argv[1].lower().endswith(EXCELTYPES):
         print("ERROR: The given filetype is not supported.")
         print("Supported excel types:", ", ".join(EXCELTYPES))
         sys.exit(1)
@@ -542,6 +3170,23 @@ if __name__ == "__main__":
     precision = 0.999 # default precision is 99.9 %
     suggestions = False # make pseudo-primary-key suggestions
     sort = 1 # the order in which the results will be printed
+    jobs = 1 # amount of processes that test combinations
+    memory = None # memory ceiling in bytes for the out-of-core mode. None means "load everything"
+    samplesize = 10000 # amount of rows every combination is tested on first. 0 means "no sample"
+    approximate = False # estimate the precision of pseudo-primary-keys with sketches
+    cachesize = None # size limit of the table cache in bytes. None means "no cache"
+    report = "primarykey_report.csv" # consolidated report of the batch mode
+    inclusions = None # report of the inclusion dependencies between the tables of the batch mode
+    top = 100 # amount of pseudo-primary-key suggestions that are kept and printed
+    statefile = None # scan state for re-validating appended rows. None means "always search"
+    profilefile = None # JSON file for the timings of every phase and level
+    cprofilefile = None # cProfile statistics of the evaluation loop
+    checkpointfile = None # saves the progress of the scan. None means "no checkpoints"
+    resume = False # continue the scan from the checkpoint
+    timebudget = None # seconds for a best-first search. None means "test every combination in order"
+    discover = False # find the minimal primary keys of any width
+    duplicates = 0 # groups of duplicates printed per suggestion
+    duplicatesfile = None # CSV file for the groups of duplicates. None means "only print them"
     
     
     # Check Parameters
@@ -590,10 +3235,156 @@ if __name__ == "__main__":
                 print("ERROR: Invalid or no --sort specifier given. Expected integer after", arg)
                 sys.exit(0)                
                 
+        elif arg in ("-j", "--jobs"):
+            try:
+                jobs = int(sys.argv[i+1])
+                if jobs < 1:
+                    raise Exception
+            except Exception:
+                print("ERROR: Invalid or no --jobs specifier given. Expected integer (>= 1) after", arg)
+                sys.exit(0)
+                
+        elif arg in ("-m", "--memory"):
+            try:
+                memory = int(float(sys.argv[i+1]) * 1024 * 1024)
+                if memory < 1:
+                    raise Exception
+            except Exception:
+                print("ERROR: Invalid or no --memory specifier given. Expected megabytes (> 0) after", arg)
+                sys.exit(0)
+                
+        elif arg == "--sample":
+            try:
+                samplesize = int(sys.argv[i+1])
+                if samplesize < 0:
+                    raise Exception
+            except Exception:
+                print("ERROR: Invalid or no --sample specifier given. Expected integer (>= 0) after", arg)
+                sys.exit(0)
+                
+        elif arg in ("-a", "--approximate"):
+            approximate = True
+            
+        elif arg in ("-t", "--top"):
+            try:
+                top = int(sys.argv[i+1])
+                if top < 1:
+                    raise Exception
+            except Exception:
+                print("ERROR: Invalid or no --top specifier given. Expected integer (>= 1) after", arg)
+                sys.exit(0)
+                
+        elif arg == "--state":
+            try:
+                statefile = sys.argv[i+1]
+            except Exception:
+                print("ERROR: Invalid or no --state specifier given. Expected file name after", arg)
+                sys.exit(0)
+                
+        elif arg == "--time-budget":
+            try:
+                timebudget = float(sys.argv[i+1])
+                if timebudget <= 0:
+                    raise Exception
+            except Exception:
+                print("ERROR: Invalid or no --time-budget specifier given. Expected seconds (> 0) after", arg)
+                sys.exit(0)
+                
+        elif arg == "--duplicates":
+            try:
+                duplicates = int(sys.argv[i+1])
+                if duplicates < 1:
+                    raise Exception
+            except Exception:
+                print("ERROR: Invalid or no --duplicates specifier given. Expected integer (>= 1) after", arg)
+                sys.exit(0)
+                
+        elif arg == "--duplicates-file":
+            try:
+                duplicatesfile = sys.argv[i+1]
+            except Exception:
+                print("ERROR: Invalid or no --duplicates-file specifier given. Expected file name after", arg)
+                sys.exit(0)
+                
+        elif arg == "--discover":
+            discover = True
+                
+        elif arg == "--checkpoint":
+            checkpointfile = filepath + ".checkpoint"
+            if i+1 < len(sys.argv) and not sys.argv[i+1].startswith("-"):
+                checkpointfile = sys.argv[i+1]
+                
+        elif arg == "--resume":
+            resume = True
+                
+        elif arg == "--profile":
+            try:
+                profilefile = sys.argv[i+1]
+            except Exception:
+                print("ERROR: Invalid or no --profile specifier given. Expected file name after", arg)
+                sys.exit(0)
+                
+        elif arg == "--cprofile":
+            try:
+                cprofilefile = sys.argv[i+1]
+            except Exception:
+                print("ERROR: Invalid or no --cprofile specifier given. Expected file name after", arg)
+                sys.exit(0)
+                
+        elif arg == "--report":
+            try:
+                report = sys.argv[i+1]
+            except Exception:
+                print("ERROR: Invalid or no --report specifier given. Expected file name after", arg)
+                sys.exit(0)
+                
+        elif arg == "--inclusions":
+            try:
+                inclusions = sys.argv[i+1]
+            except Exception:
+                print("ERROR: Invalid or no --inclusions specifier given. Expected file name after", arg)
+                sys.exit(0)
+                
+        elif arg == "--cache":
+            cachesize = 2048 * 1024 * 1024
+            if i+1 < len(sys.argv) and not sys.argv[i+1].startswith("-"):
+                try:
+                    cachesize = int(float(sys.argv[i+1]) * 1024 * 1024)
+                    if cachesize < 1:
+                        raise Exception
+                except Exception:
+                    print("ERROR: Invalid --cache specifier given. Expected megabytes (> 0) after", arg)
+                    sys.exit(0)
+                
+    # Exporting the duplicates needs some groups to export
+    if duplicatesfile and not duplicates:
+        duplicates = 10
+    
+    # A resumed scan needs the checkpoint and the table from the cache, so
+    # the scan that writes the checkpoint already stores the table there
+    if resume and checkpointfile is None:
+        checkpointfile = filepath + ".checkpoint"
+    if checkpointfile and cachesize is None:
+        cachesize = 2048 * 1024 * 1024
+    
     # Start process with timer
     start_time = time.time()
+    if batchspec is not None:
+        try:
+            tables = Batch(batchspec, maxcolumns, precision, suggestions, jobs, samplesize, approximate, cachesize, report, top, inclusions)
+        except KeyboardInterrupt:
+            print("Process cancelled through user interaction.")
+            print("Thank You for using Primary Key Finder by Max Schmeling!")
+            sys.exit(2)
+        if tables < 0:
+            sys.exit(1)
+        frmt_time = ConvertSeconds(time.time() - start_time, 2)
+        print(frmt_time[0], frmt_time[1], "for", tables, "table(s)")
+        print("Thank You for using Primary Key Finder by Max Schmeling!")
+        sys.exit(0)
+    
     try:
-        keys = Main(filepath, sheetname, maxcolumns, precision, usercolumns, verbose, sort)
+        keys = Main(filepath, sheetname, maxcolumns, precision, usercolumns, verbose, sort, jobs, memory, samplesize, approximate, cachesize, suggestions, top, statefile, profilefile, cprofilefile, checkpointfile, resume, timebudget, discover, duplicates, duplicatesfile)
     except KeyboardInterrupt:
         if sort == 3: print("\n")
         print("Process cancelled through user interaction.")
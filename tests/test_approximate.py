@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+import primarykey
+
+
+def PlantedTable(rows, seed=0):
+    """ Random columns plus the key k1 + k2 (mixed radix digits of a permutation) """
+    generator = np.random.default_rng(seed)
+    permutation = generator.permutation(rows)
+    radix = int(np.ceil(np.sqrt(rows)))
+    return pd.DataFrame({"a": generator.integers(0, 20, rows), "k1": permutation % radix,
+                         "b": generator.integers(0, 300, rows), "k2": permutation // radix,
+                         "c": generator.integers(0, 5, rows)})
+
+
+def KeyColumns(results):
+    return sorted(r.columns for r in results if r.key)
+
+
+def test_small_table_is_counted_exactly():
+    for seed in range(20):
+        generator = np.random.default_rng(seed)
+        df = pd.DataFrame({"c{}".format(i): generator.integers(0, 7, 240) for i in range(6)})
+        exact = list(primarykey.find_keys(df, max_columns=3, precision=0.99))
+        approximate = list(primarykey.find_keys(df, max_columns=3, precision=0.99, approximate=True))
+        assert KeyColumns(approximate) == KeyColumns(exact)
+        assert all(r.exact for r in approximate)
+
+
+def test_large_table_keeps_the_planted_key(tmp_path, monkeypatch):
+    sketched = []
+    estimate = primarykey.EstimateDistinct
+    monkeypatch.setattr(primarykey, "EstimateDistinct", lambda *args: sketched.append(args[1]) or estimate(*args))
+    df = PlantedTable(primarykey.SKETCHROWS + 20000)
+    # In memory the exact count is faster than the sketch
+    assert KeyColumns(primarykey.find_keys(df, max_columns=2, precision=0.99, approximate=True)) == [(1, 3)]
+    assert sketched == []
+    filepath = str(tmp_path / "planted.csv")
+    df.to_csv(filepath, index=False)
+    search = primarykey.KeySearch(primarykey.HashedColumns(filepath, range(5), 1 << 20), range(5), 2, 0.99, approximate=True)
+    assert KeyColumns(search.Results()) == [(1, 3)]
+    assert (1, 3) in sketched
+
+
+def test_sketch_is_switched_off_near_keys(tmp_path):
+    filepath = str(tmp_path / "wide.csv")
+    generator = np.random.default_rng(0)
+    rows = primarykey.SKETCHROWS + 1000
+    # Every pair is almost unique, so every estimate has to be counted exactly anyway
+    pd.DataFrame({"c{}".format(i): generator.integers(0, 20000, rows) for i in range(8)}).to_csv(filepath, index=False)
+    table = primarykey.HashedColumns(filepath, range(8), 1 << 20)
+    search = primarykey.KeySearch(table, range(8), 2, 0.9, approximate=True)
+    assert len(list(search.Results())) == 28
+    assert table.sketched == table.recounted == primarykey.SKETCHTRIAL
+
+
+def test_main_counts_only_verified_suggestions(tmp_path, capsys):
+    filepath = str(tmp_path / "planted.csv")
+    PlantedTable(primarykey.SKETCHROWS + 20000).to_csv(filepath, index=False)
+    primarykeys, pseudokeys = primarykey.Main(filepath, 1, 2, 0.9, None, False, 1, memory=1 << 20, approximate=True, suggestions=True)
+    output = capsys.readouterr().out
+    assert "--approximate is ignored" not in output
+    assert primarykeys == 1
+    assert pseudokeys == output.count("Suggestion #")
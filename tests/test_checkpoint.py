@@ -0,0 +1,56 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import primarykey
+
+
+def WriteTable(filepath):
+    generator = np.random.default_rng(3)
+    columns = {"c{}".format(c): generator.integers(0, cardinality, 3000) for c, cardinality in enumerate([40, 60, 90, 5, 3000, 20, 70, 8])}
+    pd.DataFrame(columns).to_csv(filepath, index=False)
+
+
+def Interrupt(monkeypatch, name, owner, after):
+    """ Makes <owner>.<name> raise a KeyboardInterrupt on its <after>th call, once """
+    calls = []
+    function = getattr(owner, name)
+
+    def interrupted(*args):
+        calls.append(None)
+        if len(calls) == after:
+            raise KeyboardInterrupt
+        return function(*args)
+    monkeypatch.setattr(owner, name, interrupted)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_resumed_scan_matches_an_uninterrupted_one(tmp_path, monkeypatch, capsys, jobs):
+    filepath, checkpointfile = str(tmp_path / "table.csv"), str(tmp_path / "table.checkpoint")
+    WriteTable(filepath)
+    full = primarykey.Main(filepath, 1, 3, 0.95, None, False, 1, jobs, suggestions=True)
+    output = capsys.readouterr().out.split("Starting scan...")[1]
+
+    monkeypatch.setattr(primarykey, "CHECKPOINTINTERVAL", 0)
+    with monkeypatch.context() as patch:
+        if jobs == 1:
+            Interrupt(patch, "EvaluateCombination", primarykey, 40)
+        else:
+            # The combinations are counted in the worker processes, so interrupt the main process
+            Interrupt(patch, "Update", primarykey.ScanClock, 40)
+        with pytest.raises(KeyboardInterrupt):
+            primarykey.Main(filepath, 1, 3, 0.95, None, False, 1, jobs, suggestions=True, checkpointfile=checkpointfile)
+    with open(checkpointfile, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    assert checkpoint["position"] > 0 and checkpoint["keys"] and checkpoint["candidates"]
+    capsys.readouterr()
+
+    resumed = primarykey.Main(filepath, 1, 3, 0.95, None, False, 1, jobs, suggestions=True, checkpointfile=checkpointfile, resume=True)
+    resumedoutput = capsys.readouterr().out
+    assert "Resuming the scan after" in resumedoutput
+    assert resumed == full
+    assert resumedoutput.split("Starting scan...")[1] == output
+    assert not os.path.isfile(checkpointfile)
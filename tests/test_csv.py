@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import primarykey
+
+
+def WriteLines(filepath, header, lines):
+    with open(filepath, "w", encoding="utf-8", newline="") as f:
+        f.write(header + "\n")
+        f.write("".join(line + "\n" for line in lines))
+
+
+def test_split_read_matches_a_single_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(primarykey, "pyarrow", None)
+    filepath = str(tmp_path / "plain.csv")
+    generator = np.random.default_rng(0)
+    pd.DataFrame({"id": np.arange(5000), "small": generator.integers(0, 9, 5000),
+                  "text": generator.choice(["x", "y", "z"], 5000)}).to_csv(filepath, index=False)
+    parts = []
+    split = primarykey.ReadCsvParts
+    monkeypatch.setattr(primarykey, "ReadCsvParts", lambda *args: parts.append(args) or split(*args))
+    df = primarykey.ReadCsv(filepath, partsize=4096)
+    assert parts
+    pd.testing.assert_frame_equal(df, primarykey.CompactColumns(pd.read_csv(filepath)))
+    assert df["small"].dtype == np.int8
+
+
+def test_quoted_line_break_after_the_prefix(tmp_path, monkeypatch):
+    monkeypatch.setattr(primarykey, "pyarrow", None)
+    filepath = str(tmp_path / "quoted.csv")
+    lines = ["{},plain{}".format(i, i) for i in range(20000)] # well over 64KB without any quote
+    text = "\n".join("line {}".format(i) for i in range(1000)) # longer than a part
+    lines[15000] = '15000,"{}"'.format(text)
+    WriteLines(filepath, "id,text", lines)
+    df = primarykey.ReadCsv(filepath, partsize=4096)
+    assert len(df) == 20000
+    assert df["text"][15000] == text
+    assert df["id"].tolist() == list(range(20000))
+
+
+def test_single_column_file(tmp_path):
+    filepath = str(tmp_path / "single.csv")
+    WriteLines(filepath, "id", [str(i) for i in range(100)])
+    assert primarykey.CsvOptions(filepath)["sep"] == ","
+    table = primarykey.ReadTable(filepath, 1, usecols=[0])
+    assert table.rows == 100
+    assert primarykey.Main(filepath, 1, 1, None, None, False, 1) == (1, 0)
+
+
+
+@pytest.mark.parametrize("header, values", [
+    ("date", ["2024-01-{:02d}".format(i % 28 + 1) for i in range(100)]),
+    ("amount", ["{}.{}".format(i, i % 7) for i in range(100)]),
+    ("name", ["mmm{}".format(i) for i in range(100)]),
+    ("email", ["m{}@mail.com".format(i) for i in range(100)]),
+    ("path", ["a|b{}".format(i) for i in range(100)]),
+])
+def test_single_column_values_are_not_separators(tmp_path, header, values):
+    filepath = str(tmp_path / "single.csv")
+    WriteLines(filepath, header, values)
+    assert primarykey.CsvOptions(filepath)["sep"] == ","
+    df = primarykey.ReadCsv(filepath)
+    assert list(df.columns) == [header]
+    assert df[header].astype(str).tolist() == [str(v) for v in pd.read_csv(filepath)[header]]
+
+
+def test_semicolon_separated_file(tmp_path):
+    filepath = str(tmp_path / "semicolon.csv")
+    WriteLines(filepath, "name;amount", ["m{};{},5".format(i, i) for i in range(100)])
+    assert primarykey.CsvOptions(filepath)["sep"] == ";"
+    assert list(primarykey.ReadCsv(filepath).columns) == ["name", "amount"]
@@ -0,0 +1,59 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import primarykey
+
+
+def MinimalKeys(df):
+    """ Every minimal primary key of any width, by testing all combinations """
+    values = [df.iloc[:, c].tolist() for c in range(df.shape[1])]
+    keys = []
+    for width in range(1, df.shape[1] + 1):
+        for columns in itertools.combinations(range(df.shape[1]), width):
+            if any(set(k) <= set(columns) for k in keys):
+                continue
+            if len(set(zip(*(values[c] for c in columns)))) == len(df):
+                keys.append(columns)
+    return set(keys)
+
+
+def RandomTable(generator):
+    rows = int(generator.integers(1, 300))
+    df = pd.DataFrame({"c{}".format(i): generator.integers(0, int(generator.integers(1, 8)), rows) for i in range(int(generator.integers(1, 11)))})
+    if rows > 1 and generator.random() < 0.2:
+        df = pd.concat([df, df.iloc[:1]], ignore_index=True) # a duplicated row, no key at all
+    return df
+
+
+def Discovered(search, memory):
+    found = set()
+    for result in search.Discover(memory):
+        found.add(result.columns)
+        found.update(alternative.columns for alternative in search.Alternatives(result))
+    return found
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_discover_matches_brute_force(seed):
+    generator = np.random.default_rng(seed)
+    for _ in range(5):
+        df = RandomTable(generator)
+        columns = range(df.shape[1])
+        search = primarykey.KeySearch(primarykey.EncodeColumns(df, columns), columns, 3, None, 1, int(generator.integers(0, 50)))
+        # A small memory for the partition cache forces it to drop partitions
+        assert Discovered(search, int(generator.integers(1, 1 << 20))) == MinimalKeys(df)
+
+
+def test_discover_on_spilled_hashes(tmp_path):
+    generator = np.random.default_rng(7)
+    for i in range(5):
+        df = RandomTable(generator)
+        filepath = str(tmp_path / "table{}.csv".format(i))
+        df.to_csv(filepath, index=False)
+        columns = range(df.shape[1])
+        # With 4KB of memory every count spills its hashes into several partitions
+        search = primarykey.KeySearch(primarykey.HashedColumns(filepath, columns, 4096, 20), columns, 3)
+        assert Discovered(search, 1 << 20) == MinimalKeys(df)
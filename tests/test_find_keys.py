@@ -0,0 +1,92 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import primarykey
+
+
+def BruteForce(df, maxcolumns, precision):
+    """ Every combination that reaches <precision>, without supersets of primary keys and constant columns """
+    keys = []
+    results = {}
+    searched = [c for c in range(df.shape[1]) if df.iloc[:, c].nunique(dropna=False) > 1]
+    for width in range(1, maxcolumns + 1):
+        for columns in itertools.combinations(searched, width):
+            if any(set(k) <= set(columns) for k in keys):
+                continue
+            distinct = len(df.iloc[:, list(columns)].drop_duplicates())
+            if distinct == len(df):
+                keys.append(columns)
+            if distinct >= primarykey.MinimumDistinct(len(df), precision):
+                results[columns] = distinct
+    return results
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_find_keys_matches_brute_force(seed):
+    generator = np.random.default_rng(seed)
+    rows = int(generator.integers(2, 200))
+    df = pd.DataFrame({"c{}".format(i): generator.integers(0, int(generator.integers(1, 12)), rows) for i in range(int(generator.integers(1, 7)))})
+    if seed % 3 == 0:
+        df["copy"] = df.iloc[:, 0].astype(str) + "x" # an equivalent column
+    precision = [None, 0.9, 0.97][seed % 3]
+    results = {r.columns: r.distinct for r in primarykey.find_keys(df, max_columns=3, precision=precision, sample_size=int(generator.integers(0, 50)))}
+    assert results == BruteForce(df, 3, 1.0 if precision is None else precision)
+
+
+def test_find_keys_stops_early():
+    df = pd.DataFrame({"a": [1, 2, 3], "b": [1, 1, 2]})
+    first = next(primarykey.find_keys(df), None)
+    assert first.names == ("a",) and first.key
+
+
+def Scan(search, start=0, keys=()):
+    """ The (combination index, columns, distinct) of every result of <search>.Results() """
+    order = []
+    return [(start + len(order) - 1, r.columns, r.distinct) for r in search.Results(lambda *args: order.append(args), start, keys)]
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_parallel_scan_matches_serial(seed):
+    generator = np.random.default_rng(seed)
+    rows = int(generator.integers(30, 150))
+    df = pd.DataFrame({"c{}".format(i): generator.integers(0, int(generator.integers(3, 60)), rows) for i in range(int(generator.integers(4, 9)))})
+    columns = range(df.shape[1])
+    table = primarykey.EncodeColumns(df, columns)
+    precision = [None, 0.8][seed % 2]
+    serial = Scan(primarykey.KeySearch(table, columns, 3, precision, 1, 20))
+    total = primarykey.KeySearch(table, columns, 3, precision).Predict()[0]
+    for start in sorted(set([0, int(generator.integers(1, total)), total - 1])):
+        # A resumed scan only knows the primary keys found before <start>
+        keys = [c for i, c, distinct in serial if i < start and distinct == rows]
+        expected = [r for r in serial if r[0] >= start]
+        assert Scan(primarykey.KeySearch(table, columns, 3, precision, 1, 20), start, keys) == expected
+        assert Scan(primarykey.KeySearch(table, columns, 3, precision, 2, 20), start, keys) == expected
+        # Small batches split the levels, every combination keeps its status
+        search = primarykey.KeySearch(table, columns, 3, precision)
+        arguments = (search.cardinalities, rows, search.searchlist, 3, search.minimum)
+        lattice = primarykey.PartitionLattice(table.codes, table.cardinalities, rows)
+        assert list(primarykey.ScanCombinationsParallel(table.codes, *arguments, 2, start=start, keys=keys, batchsize=3)) == \
+            list(primarykey.ScanCombinations(lattice, *arguments, start=start, keys=keys))
+
+
+@pytest.mark.parametrize("options", [{}, {"sort": 2}, {"sort": 3}, {"discover": True}, {"statefile": True}])
+def test_equivalent_columns_count_like_spilled_hashes(tmp_path, options):
+    generator = np.random.default_rng(0)
+    filepath = str(tmp_path / "table.csv")
+    df = pd.DataFrame({"a": np.arange(300), "c": generator.integers(0, 100, 300), "d": generator.integers(0, 9, 300)})
+    df.insert(1, "b", df["a"]) # a and b are the same key
+    df["e"] = df["c"] # c + d and e + d are the same pseudo-primary-key
+    df.to_csv(filepath, index=False)
+    options = dict(options, sort=options.get("sort", 1))
+    counts = []
+    for memory in (None, 1 << 20):
+        if options.get("statefile"):
+            options["statefile"] = str(tmp_path / "table{}.npz".format(memory))
+            primarykey.Main(filepath, 1, 2, 0.75, None, False, memory=memory, suggestions=True, **options)
+        counts.append(primarykey.Main(filepath, 1, 2, 0.75, None, False, memory=memory, suggestions=True, **options))
+    assert counts[0] == counts[1]
+    assert counts[0][0] == 2
+    assert options.get("discover") or counts[0][1] == 2
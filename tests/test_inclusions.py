@@ -0,0 +1,84 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import primarykey
+
+
+def Normalized(df, columns):
+    """ The value combinations of <columns>, whole floats written like ints (see InclusionHashes()) """
+    values = [[str(int(v)) if isinstance(v, float) and v.is_integer() else str(v) for v in df.iloc[:, c]] for c in columns]
+    return set(zip(*values))
+
+
+def BruteForce(frames, keys):
+    """ Every unary inclusion of a column that is not constant and every composite one towards the <keys> """
+    found = set()
+    for (i, dependent), (j, referenced) in itertools.permutations(enumerate(frames), 2):
+        for a, b in itertools.product(range(dependent.shape[1]), range(referenced.shape[1])):
+            if dependent.iloc[:, a].nunique() > 1 and Normalized(dependent, [a]) <= Normalized(referenced, [b]):
+                found.add((i, (a,), j, (b,), referenced.iloc[:, b].nunique() == len(referenced)))
+    for j, key in keys:
+        for i, dependent in enumerate(frames):
+            if i == j:
+                continue
+            for columns in itertools.permutations(range(dependent.shape[1]), len(key)):
+                if Normalized(dependent, columns) <= Normalized(frames[j], key):
+                    found.add((i, columns, j, key, True))
+    return found
+
+
+def Inclusions(frames):
+    tables, records = [], []
+    for i, df in enumerate(frames):
+        table = primarykey.EncodeColumns(df, range(df.shape[1]))
+        results = list(primarykey.KeySearch(table, range(df.shape[1]), 2).Results())
+        tables.append(((i, 1), table))
+        records.append((i, 1, table.rows, df.shape[1], results))
+    keys = [(i, result.columns) for i, _, _, _, results in records for result in results if result.key and len(result.columns) > 1]
+    found = primarykey.FindInclusions(tables, records)
+    return set((d[0][0], tuple(dc), r[0][0], tuple(rc), key) for d, dc, r, rc, key in found), keys
+
+
+def RandomFrame(generator, rows):
+    columns = {}
+    for c in range(int(generator.integers(2, 5))):
+        values = generator.integers(0, int(generator.integers(1, 8)), rows) + int(generator.integers(0, 3))
+        kind = generator.integers(0, 3)
+        if kind == 1:
+            values = values.astype(float) # matches the ints of other tables
+        elif kind == 2:
+            values = np.array(["v{}".format(v) for v in values], dtype=object)
+        columns["c{}".format(c)] = values
+    return pd.DataFrame(columns)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_find_inclusions_matches_brute_force(seed):
+    generator = np.random.default_rng(seed)
+    frames = [RandomFrame(generator, int(generator.integers(2, 40))) for _ in range(3)]
+    found, keys = Inclusions(frames)
+    assert found == BruteForce(frames, keys)
+
+
+def test_value_ranges_rule_out_pairs(monkeypatch):
+    compared = []
+    contains = primarykey.ContainsValues
+    monkeypatch.setattr(primarykey, "ContainsValues", lambda container, values: compared.append((len(container), len(values))) or contains(container, values))
+    for low, high in ((range(5), range(100, 200)), (["a{}".format(i) for i in range(5)], ["b{}".format(i) for i in range(100)])):
+        frames = [pd.DataFrame({"low": low}), pd.DataFrame({"high": high})]
+        # The hash range of the larger column covers the smaller one, only the values do not
+        lowindex, highindex = (primarykey.ValueIndex(primarykey.EncodeColumns(df, [0]), 0) for df in frames)
+        assert highindex[0] <= lowindex[0] and highindex[-1] >= lowindex[-1]
+        found, _ = Inclusions(frames)
+        assert found == set()
+    assert compared == []
+
+
+def test_value_range_of_mixed_columns():
+    table = primarykey.EncodeColumns(pd.DataFrame({"number": [3, 1.5, None], "text": ["b", "a", None], "mixed": [1, "a", None]}), range(3))
+    assert primarykey.ValueRange(table, 0) == ("number", 1.5, 3)
+    assert primarykey.ValueRange(table, 1) == ("text", "a", "b")
+    assert primarykey.ValueRange(table, 2) == (None, None, None)
@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import primarykey
+
+
+def WriteTable(filepath, rows, seed=0):
+    """ Writes <rows> rows, the first rows are the same for any amount of rows """
+    columns = {"id": np.arange(rows)}
+    for c, cardinality in enumerate([50, 80, 3]):
+        columns["c{}".format(c)] = np.random.default_rng(seed + c).integers(0, cardinality, rows)
+    pd.DataFrame(columns).to_csv(filepath, index=False)
+
+
+def test_search_cut_short_is_not_saved(tmp_path):
+    filepath, statefile = str(tmp_path / "table.csv"), str(tmp_path / "table.npz")
+    WriteTable(filepath, 2000)
+    primarykey.Main(filepath, 1, 3, 0.99, None, False, 1, statefile=statefile, timebudget=0)
+    assert not os.path.exists(statefile)
+    full = primarykey.Main(filepath, 1, 3, 0.99, None, False, 1, statefile=statefile)
+    assert os.path.exists(statefile)
+    assert primarykey.Main(filepath, 1, 3, 0.99, None, False, 1, statefile=statefile) == full
+
+
+def test_appended_rows_update_the_saved_results(tmp_path, capsys):
+    filepath, statefile = str(tmp_path / "table.csv"), str(tmp_path / "table.npz")
+    WriteTable(filepath, 3000)
+    primarykey.Main(filepath, 1, 3, 0.97, None, False, 1, statefile=statefile)
+    with np.load(statefile) as data:
+        assert len(data.files) - 1 == len(primarykey.LoadScanState(statefile)[0]["keys"]) # no index for the suggestions
+    WriteTable(filepath, 3500) # the same first 3000 rows
+    capsys.readouterr()
+    revalidated = primarykey.Main(filepath, 1, 3, 0.97, None, False, 1, statefile=statefile, suggestions=True)
+    output = capsys.readouterr().out
+    assert "Checked 500 new row(s)" in output
+    assert revalidated == primarykey.Main(filepath, 1, 3, 0.97, None, False, 1, suggestions=True)
+    assert output.split("Checked 500 new row(s) against the saved scan state.")[1] == capsys.readouterr().out.split("Starting scan...")[1]